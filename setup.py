@@ -58,14 +58,20 @@ setup(
                 'sinatools.CLI.morphology.morph_analyzer:main'),
             ('alma_multi_word='
                 'sinatools.CLI.morphology.ALMA_multi_word:main'),
+            ('build_morph_lexicon='
+                'sinatools.CLI.morphology.build_lexicon:main'),
             ('entity_extractor='
                 'sinatools.CLI.ner.entity_extractor:main'),
+            ('export_ner_model='
+                'sinatools.CLI.ner.export_model:main'),
             ('remove_punctuation='
                 'sinatools.CLI.utils.remove_punctuation:main'),
             ('remove_latin='
                 'sinatools.CLI.utils.remove_latin:main'),
             ('wsd='
                 'sinatools.CLI.wsd.disambiguator:main'),
+            ('build_gloss_cache='
+                'sinatools.CLI.wsd.build_gloss_cache:main'),
             ('corpus_tokenizer='
                 'sinatools.CLI.utils.corpus_tokenizer:main'),
             ('appdatadir='
@@ -90,6 +96,7 @@ setup(
     data_files=[('sinatools', ['sinatools/environment.yml'])],
     package_data={'sinatools': ['data/*.pickle', 'environment.yml']},
     install_requires=requirements,
+    extras_require={'parquet': ['pyarrow'], 'onnx': ['onnx', 'onnxruntime']},
     license="MIT license",
     description='Open-source Python toolkit for Arabic Natural Understanding, allowing people to integrate it in their system workflow.',
     long_description = readme + "\n",
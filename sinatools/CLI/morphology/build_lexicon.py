@@ -0,0 +1,45 @@
+"""
+About:
+------
+The build_morph_lexicon command converts the pickled morphology dictionaries (lemmas and n-grams) in the SinaTools data directory into memory-mapped lexicon files. Once converted, the morphology APIs query the lexicon files in place, so processes running the morphological analyzer share one copy of the lexicon and start almost instantly.
+
+Usage:
+------
+Below is the usage information that can be generated by running build_morph_lexicon --help.
+
+.. code-block:: none
+
+    build_morph_lexicon [OPTIONS]
+
+Options:
+--------
+
+.. code-block:: none
+
+  --resources RESOURCES [RESOURCES ...]
+        The dictionaries to convert. Available options are: lemmas, two_grams, three_grams, four_grams, five_grams. All of them are converted by default.
+
+Examples:
+---------
+
+.. code-block:: none
+
+  build_morph_lexicon
+  build_morph_lexicon --resources lemmas
+
+"""
+
+import argparse
+from sinatools import morphology
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert the SinaTools morphology dictionaries into memory-mapped lexicon files')
+    parser.add_argument('--resources', nargs='+', choices=list(morphology._RESOURCE_FILES), help='The dictionaries to convert (default: all)')
+
+    args = parser.parse_args()
+
+    for path in morphology.convert_resources(args.resources):
+        print(path)
+
+if __name__ == '__main__':
+    main()
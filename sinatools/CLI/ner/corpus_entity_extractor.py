@@ -4,7 +4,7 @@ from sinatools.utils.tokenizer import sentence_tokenizer
 from sinatools.utils.tokenizers_words import simple_word_tokenize
 import pandas as pd
 import argparse
-from sinatools.ner.entity_extractor import extract
+from sinatools.ner.entity_extractor import extract_batch
 
 """
 The following command takes a CSV file as input. It splits a specific column into tokens and tags them using named entity recognition (NER). It retains all other columns as they are, and it also adds sentences and tokens. Additionally, it assigns an auto-incrementing ID, a sentence ID, and a global sentence ID to each token. As follows:
@@ -13,7 +13,7 @@ Usage:
 ------
 Below is the usage information that can be generated by running corpus_entity_extractor --help.
 
-corpus_entity_extractor --input_csv path/to/csv/file --text-columns "name of the column to be tokenized" --additional-columns "Column3,Column4" --output-csv path/to/csv/file
+corpus_entity_extractor --input_csv path/to/csv/file --text-columns "name of the column to be tokenized" --additional-columns "Column3,Column4" --output-csv path/to/csv/file [--output_format parquet]
 
 Options:
 -------
@@ -25,6 +25,10 @@ Options:
           name of columns that returned as they are
     -- output-csv
           path to csv file 
+    -- output_format
+          csv (default) or parquet. With parquet, output-csv is a directory where sentences.parquet
+          (each sentence once, with the additional columns) and words.parquet (one row per word with
+          its NER tags and the Global Sentence ID of its sentence) are written. Requires pyarrow.
 
 corpus_entity_extractor  --input_csv "input.csv" --text-columns "TextColumn1" --additional-columns "Column3,Column4" --output-csv "output.csv"          
 """
@@ -32,13 +36,32 @@ corpus_entity_extractor  --input_csv "input.csv" --text-columns "TextColumn1" --
 def jsons_to_list_of_lists(json_list):
     return [[d['token'], d['tags']] for d in json_list]
 
-def combine_tags(sentence):
-    output = jsons_to_list_of_lists(extract(sentence, "nested"))
-    return [word[1] for word in output]
-
-
-def corpus_tokenizer(input_csv, output_csv, text_column, additional_columns, row_id, global_sentence_id):
+def tag_sentences(df, text_column, batch_size=256):
+    """
+    Split the text column of each row into sentences and tag them, batch_size sentences at a time.
+    Yields (row, sentence_id, sentence, words, tags) in the order of the rows and sentences.
+    """
+    pending = []
+    for index, row in df.iterrows():
+        sentences = sentence_tokenizer(row[text_column], dot=True, new_line=True, question_mark=False, exclamation_mark=False)
+        pending += [(row, sentence_id, sentence) for sentence_id, sentence in enumerate(sentences, start=1)]
+        if len(pending) >= batch_size:
+            yield from _tag_pending(pending)
+            pending = []
+    yield from _tag_pending(pending)
+
+def _tag_pending(pending):
+    outputs = extract_batch([sentence for _, _, sentence in pending], "nested")
+    for (row, sentence_id, sentence), output in zip(pending, outputs):
+        tags = [word[1] for word in jsons_to_list_of_lists(output)]
+        yield row, sentence_id, sentence, simple_word_tokenize(sentence), tags
+
+
+def corpus_tokenizer(input_csv, output_csv, text_column, additional_columns, row_id, global_sentence_id, output_format='csv'):
     print(input_csv, output_csv, text_column, additional_columns)
+    if output_format == 'parquet':
+        corpus_tokenizer_parquet(input_csv, output_csv, text_column, additional_columns, row_id, global_sentence_id)
+        return
     row_id = row_id - 1
     global_sentence_id = global_sentence_id - 1
     fieldnames = ['Row_ID', 'Docs_Sentence_Word_ID', 'Global Sentence ID', 'Sentence ID', 'Sentence', 'Word Position', 'Word', 'Ner tags']
@@ -50,23 +73,47 @@ def corpus_tokenizer(input_csv, output_csv, text_column, additional_columns, row
         writer.writeheader()
         
         df = pd.read_csv(input_csv)
-        for index, row in df.iterrows():            
-            sentences = sentence_tokenizer(row[text_column], dot=True, new_line=True, question_mark=False, exclamation_mark=False)
-            for sentence_id, sentence in enumerate(sentences, start=1):
-                words = simple_word_tokenize(sentence)
-                global_sentence_id += 1
-
-                tags = combine_tags(sentence) 
-                for word_position, word in enumerate(words, start=1):
-                    row_id += 1
-                    doc_sentence_filename = input_csv.split(".csv")[0]
-                    docs_sentence_word_id = f"{doc_sentence_filename}_{global_sentence_id}_{sentence_id}_{word_position}"
-                    output_dic = {'Row_ID': row_id, 'Docs_Sentence_Word_ID': docs_sentence_word_id, 'Global Sentence ID': global_sentence_id, 'Sentence ID': sentence_id, 
-                                  'Sentence': sentence, 'Word Position': word_position, 'Word': word, 'Ner tags':tags[word_position-1]}
-                    for additional_column in additional_columns:
-                        output_dic[additional_column] = row[additional_column]
-
-                    writer.writerow(output_dic)                                                                                                                                                                                                                                          
+        for row, sentence_id, sentence, words, tags in tag_sentences(df, text_column):
+            global_sentence_id += 1
+
+            for word_position, word in enumerate(words, start=1):
+                row_id += 1
+                doc_sentence_filename = input_csv.split(".csv")[0]
+                docs_sentence_word_id = f"{doc_sentence_filename}_{global_sentence_id}_{sentence_id}_{word_position}"
+                output_dic = {'Row_ID': row_id, 'Docs_Sentence_Word_ID': docs_sentence_word_id, 'Global Sentence ID': global_sentence_id, 'Sentence ID': sentence_id, 
+                              'Sentence': sentence, 'Word Position': word_position, 'Word': word, 'Ner tags':tags[word_position-1]}
+                for additional_column in additional_columns:
+                    output_dic[additional_column] = row[additional_column]
+
+                writer.writerow(output_dic)                                                                                                                                                                                                                                          
+
+def corpus_tokenizer_parquet(input_csv, output_dir, text_column, additional_columns, row_id, global_sentence_id):
+    from sinatools.utils.columnar import ColumnarCorpusWriter
+
+    row_id = row_id - 1
+    global_sentence_id = global_sentence_id - 1
+    sentence_columns = ['Global Sentence ID', 'Sentence ID', 'Sentence'] + list(additional_columns)
+    word_columns = ['Row_ID', 'Docs_Sentence_Word_ID', 'Global Sentence ID', 'Word Position', 'Word', 'Ner tags']
+    doc_sentence_filename = input_csv.split(".csv")[0]
+
+    with ColumnarCorpusWriter(output_dir, sentence_columns, word_columns) as writer:
+        df = pd.read_csv(input_csv)
+        for row, sentence_id, sentence, words, tags in tag_sentences(df, text_column):
+            global_sentence_id += 1
+            sentence_row = {'Global Sentence ID': global_sentence_id, 'Sentence ID': sentence_id, 'Sentence': sentence}
+            for additional_column in additional_columns:
+                # as text, like in the csv output, so that every row group has the same type
+                sentence_row[additional_column] = str(row[additional_column])
+            writer.write_sentence(sentence_row)
+
+            for word_position, word in enumerate(words, start=1):
+                row_id += 1
+                writer.write_word({'Row_ID': row_id,
+                                   'Docs_Sentence_Word_ID': f"{doc_sentence_filename}_{global_sentence_id}_{sentence_id}_{word_position}",
+                                   'Global Sentence ID': global_sentence_id,
+                                   'Word Position': word_position,
+                                   'Word': word,
+                                   'Ner tags': tags[word_position-1]})
 
 def main():
     parser = argparse.ArgumentParser(description="CSV NER Tagging Tool")
@@ -81,9 +128,11 @@ def main():
                     help="Row id to starts with")
     parser.add_argument("--global_sentence_id", default="1",
                     help="global_sentence_id to starts with")
+    parser.add_argument("--output_format", default="csv", choices=["csv", "parquet"],
+                    help="csv, or parquet to write sentences and words to two files in the output_csv directory")
 
     args = parser.parse_args()
-    corpus_tokenizer(args.input_csv, args.output_csv, args.text_column, args.additional_columns, int(args.row_id), int(args.global_sentence_id))
+    corpus_tokenizer(args.input_csv, args.output_csv, args.text_column, args.additional_columns, int(args.row_id), int(args.global_sentence_id), args.output_format)
 
 
 if __name__ == "__main__":
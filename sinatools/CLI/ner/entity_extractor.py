@@ -40,7 +40,6 @@ import json
 import pandas as pd
 from sinatools.ner.entity_extractor import extract
 from sinatools.utils.tokenizer import corpus_tokenizer
-from sinatools.utils.tokenizers_words import simple_word_tokenize
 
 def jsons_to_list_of_lists(json_list):
     return [[d['token'], d['tags']] for d in json_list]
@@ -74,10 +73,6 @@ def main():
 
         for sentence in unique_sentences: 
             ner_tags = combine_tags(sentence) 
-            if len(simple_word_tokenize(sentence)) > 300:
-                print(" Length of this sentence is more than 300 word:  ", sentence)
-                return
-            
             df.loc[i:i+len(ner_tags)-1, 'NER tags'] = ner_tags 
             i = i + len(ner_tags)
         
@@ -0,0 +1,77 @@
+"""
+About:
+------
+The export_ner_model command exports the SinaTools NER model for fast CPU inference. The model weights are quantized to int8, and the model is saved as TorchScript or ONNX. Optionally, a held-out CoNLL file is tagged with both the original model and the exported model to check that their predictions agree.
+
+Usage:
+------
+Below is the usage information that can be generated by running export_ner_model --help.
+
+.. code-block:: none
+
+    export_ner_model --output OUTPUT [OPTIONS]
+
+Options:
+--------
+
+.. code-block:: none
+
+  --output OUTPUT
+        Path of the exported model, e.g. ner.pt for TorchScript or ner.onnx for ONNX.
+  --format {torchscript,onnx}
+        The export format (default: torchscript). ONNX requires onnxruntime.
+  --no_quantize
+        Keep the weights in fp32.
+  --parity_conll PARITY_CONLL
+        A CoNLL file, tagged with both models to compare their predictions.
+
+Examples:
+---------
+
+.. code-block:: none
+
+  export_ner_model --output ner.pt
+  export_ner_model --output ner.onnx --format onnx --parity_conll test.txt
+
+The exported model is then used through a NER session:
+
+.. code-block:: python
+
+    from sinatools.ner import tagger
+    from sinatools.ner.export import exported_tagger
+    from sinatools.ner.entity_extractor import NERSession
+    session = NERSession(tagger=exported_tagger('ner.pt', tagger))
+    session.extract('ذهب محمد الى جامعة بيرزيت')
+
+"""
+
+import argparse
+from sinatools.ner import tagger, tag_vocab, train_config
+from sinatools.ner.data_format import texts2segments
+from sinatools.ner.entity_extractor import NERSession
+from sinatools.ner.export import export_model, exported_tagger, check_parity
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the SinaTools NER model for CPU inference')
+    parser.add_argument('--output', required=True, help='Path of the exported model (.pt or .onnx)')
+    parser.add_argument('--format', default='torchscript', choices=['torchscript', 'onnx'], help='The export format')
+    parser.add_argument('--no_quantize', action='store_true', help='Keep the weights in fp32')
+    parser.add_argument('--parity_conll', help='A CoNLL file tagged with both models to compare their predictions')
+
+    args = parser.parse_args()
+
+    # The model is traced with a batch of two example segments truncated to max_seq_len, so
+    # that the trace is not specialised to a single segment or to a short sequence
+    transform = NERSession().transform
+    segments = texts2segments([' '.join(['ذهب محمد الى جامعة بيرزيت'] * transform.max_seq_len)])
+    example_subwords = transform(segments[0])[0].repeat(2, 1)
+
+    export_model(tagger.model, args.output, example_subwords, export_format=args.format, quantize=not args.no_quantize)
+    print(args.output)
+
+    if args.parity_conll:
+        parity = check_parity(tagger, exported_tagger(args.output, tagger), args.parity_conll, tag_vocab, train_config)
+        print(f"Agreement: {parity.agreement:.4f} | Eager F1: {parity.eager_f1:.4f} | Exported F1: {parity.exported_f1:.4f}")
+
+if __name__ == '__main__':
+    main()
@@ -11,7 +11,7 @@ Below is the usage information that can be generated by running corpus_tokenizer
 .. code-block:: none
 
     Usage:
-        corpus_tokenizer dir_path output_csv
+        corpus_tokenizer dir_path output_csv [workers] [manifest] [output_format]
 
 .. code-block:: none
     dir_path
@@ -20,10 +20,20 @@ Below is the usage information that can be generated by running corpus_tokenizer
     output_csv
         The path to the output CSV file.
 
+    workers
+        The number of processes that tokenize files in parallel (default: 1).
+
+    manifest
+        The path of a checkpoint manifest. If it exists, an interrupted run is resumed from it.
+
+    output_format
+        csv (default) or parquet. With parquet, output_csv is a directory where sentences.parquet and words.parquet are written (requires pyarrow).
+
 Examples:
 ---------
 .. code-block:: none
     corpus_tokenizer --dir_path "/path/to/text/directory/of/files" --output_csv  "outputFile.csv"
+    corpus_tokenizer --dir_path "/path/to/text/directory/of/files" --output_csv  "outputFile.csv" --workers 8 --manifest "outputFile.manifest"
 """
 
 import argparse
@@ -37,12 +47,15 @@ def main():
     # Add arguments to the parser
     parser.add_argument('--dir_path', type=str, help='The path to the directory containing the text files.')
     parser.add_argument('--output_csv', type=str, help='The path to the output CSV file.')
+    parser.add_argument('--workers', type=int, default=1, help='The number of processes that tokenize files in parallel.')
+    parser.add_argument('--manifest', type=str, help='The path of a checkpoint manifest used to resume an interrupted run.')
+    parser.add_argument('--output_format', type=str, default='csv', choices=['csv', 'parquet'], help='The output format. With parquet, output_csv is a directory.')
     
     # Parse the command-line arguments
     args = parser.parse_args()
     
     # Call the corpus_tokenizer function with the parsed arguments
-    corpus_tokenizer(args.dir_path, args.output_csv)
+    corpus_tokenizer(args.dir_path, args.output_csv, workers=args.workers, manifest=args.manifest, output_format=args.output_format)
 
 # Call the main function when the script is executed
 if __name__ == '__main__':
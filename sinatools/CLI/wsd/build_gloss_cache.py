@@ -0,0 +1,43 @@
+"""
+About:
+------
+The build_gloss_cache command encodes the glosses of all the concepts used by the word sense disambiguation (WSD) into subword IDs, once, and writes them to a memory-mapped file in the SinaTools data directory. Once built, WSD reads the encoded glosses of the candidate concepts from this file instead of preprocessing and tokenizing them again for every ambiguous word.
+
+Usage:
+------
+Below is the usage information that can be generated by running build_gloss_cache --help.
+
+.. code-block:: none
+
+    build_gloss_cache [OPTIONS]
+
+Options:
+--------
+
+.. code-block:: none
+
+  --output OUTPUT
+        Path of the gloss encodings file. Defaults to gloss_encodings.lex in the SinaTools data directory, which is where WSD looks for it.
+
+Examples:
+---------
+
+.. code-block:: none
+
+  build_gloss_cache
+
+"""
+
+import argparse
+from sinatools.wsd.wsd import build_gloss_cache
+
+def main():
+    parser = argparse.ArgumentParser(description='Encode the WSD glosses into a memory-mapped file')
+    parser.add_argument('--output', help='Path of the gloss encodings file (default: gloss_encodings.lex in the data directory)')
+
+    args = parser.parse_args()
+
+    print(build_gloss_cache(args.output))
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,15 @@
 from sinatools.utils.parser import arStrip
-from . import five_grams_dict, four_grams_dict  , three_grams_dict , two_grams_dict
+from . import get_resource
+
+_NGRAM_RESOURCES = {2: 'two_grams', 3: 'three_grams', 4: 'four_grams'}
 
 def ALMA_multi_word(multi_word, n):
     undiac_multi_word = arStrip(multi_word, True, True, True, False, True, False)  # diacs , smallDiacs , shaddah ,  digit , alif , specialChars
     result_word = []
-    if n == 2:
-        if undiac_multi_word in two_grams_dict.keys():
-            result_word = two_grams_dict[undiac_multi_word]                    
-    elif n == 3:
-        if undiac_multi_word in three_grams_dict.keys():
-            result_word = three_grams_dict[undiac_multi_word]                    
-    elif n == 4:
-        if undiac_multi_word in four_grams_dict.keys():
-            result_word = four_grams_dict[undiac_multi_word]                    
-    else:    
-     if undiac_multi_word in five_grams_dict.keys():
-         result_word = five_grams_dict[undiac_multi_word]            
+    # only the dictionary for this n is loaded, the first time it is needed
+    ngrams_dict = get_resource(_NGRAM_RESOURCES.get(n, 'five_grams'))
+    if undiac_multi_word in ngrams_dict.keys():
+        result_word = ngrams_dict[undiac_multi_word]
     
     my_json = {}
     output_list = []
@@ -1,43 +1,128 @@
 import pickle
 from sinatools.DataDownload import downloader
-import os 
-
-dictionary = {}
-five_grams_dict = {} 
-four_grams_dict = {}
-three_grams_dict = {}
-two_grams_dict = {} 
-
-filename = 'lemmas_dic.pickle'
-path = downloader.get_appdatadir()
-file_path = os.path.join(path, filename)
-with open(file_path, 'rb') as f:
-    dictionary = pickle.load(f)
-
-filename_five = 'five_grams.pickle'
-path =downloader.get_appdatadir()
-file_path = os.path.join(path, filename_five)
-with open(file_path, 'rb') as f:
-   five_grams_dict = pickle.load(f, encoding='utf-8')
-
-
-filename_four = 'four_grams.pickle'
-path =downloader.get_appdatadir()
-file_path = os.path.join(path, filename_four)
-with open(file_path, 'rb') as f:
-  four_grams_dict = pickle.load(f, encoding='utf-8')
-  
-     
-filename_three = 'three_grams.pickle'
-path =downloader.get_appdatadir()
-file_path = os.path.join(path, filename_three)
-with open(file_path, 'rb') as f:
-  three_grams_dict = pickle.load(f, encoding='utf-8')
-  
-
-filename_two = 'two_grams.pickle'
-path =downloader.get_appdatadir()
-file_path = os.path.join(path, filename_two)
-with open(file_path, 'rb') as f:
-  two_grams_dict = pickle.load(f, encoding='utf-8')
-  
\ No newline at end of file
+import os
+import threading
+import warnings
+from sinatools.morphology.lexicon import MmapLexicon, convert_pickle
+
+# Resource name -> pickle file name in the application data directory.
+# Nothing is read at import time; each dictionary is loaded the first
+# time it is requested through get_resource(). If a lexicon file with the
+# same name and a .lex extension exists (see convert_resources), it is
+# memory-mapped instead of unpickling the dictionary, unless the pickle is
+# newer (e.g. the data was downloaded again after the conversion).
+_RESOURCE_FILES = {
+    'lemmas': 'lemmas_dic.pickle',
+    'two_grams': 'two_grams.pickle',
+    'three_grams': 'three_grams.pickle',
+    'four_grams': 'four_grams.pickle',
+    'five_grams': 'five_grams.pickle',
+}
+
+# Old module-level names, kept so that `from sinatools.morphology import dictionary`
+# still works (the dictionary is loaded on first access).
+_LEGACY_NAMES = {
+    'dictionary': 'lemmas',
+    'two_grams_dict': 'two_grams',
+    'three_grams_dict': 'three_grams',
+    'four_grams_dict': 'four_grams',
+    'five_grams_dict': 'five_grams',
+}
+
+_resources = {}
+_lock = threading.Lock()
+
+
+def get_resource(name):
+    """
+    Returns one of the morphology dictionaries, loading it from the application data directory the first time it is requested.
+
+    Args:
+        name (:obj:`str`): The resource name, one of [lemmas, two_grams, three_grams, four_grams, five_grams].
+
+    Returns:
+        :obj:`dict`: The loaded dictionary, or a :class:`~sinatools.morphology.lexicon.MmapLexicon` with the same interface.
+    """
+    resource = _resources.get(name)
+    if resource is None:
+        with _lock:
+            resource = _resources.get(name)
+            if resource is None:
+                lexicon_path = _lexicon_path(name)
+                file_path = os.path.join(downloader.get_appdatadir(), _RESOURCE_FILES[name])
+                if _is_current(lexicon_path, file_path):
+                    resource = MmapLexicon(lexicon_path)
+                else:
+                    with open(file_path, 'rb') as f:
+                        resource = pickle.load(f, encoding='utf-8')
+                _resources[name] = resource
+    return resource
+
+
+def _lexicon_path(name):
+    return os.path.join(downloader.get_appdatadir(), os.path.splitext(_RESOURCE_FILES[name])[0] + '.lex')
+
+
+def _is_current(lexicon_path, pickle_path):
+    if not os.path.exists(lexicon_path):
+        return False
+    if os.path.exists(pickle_path) and os.path.getmtime(pickle_path) > os.path.getmtime(lexicon_path):
+        warnings.warn(f"{lexicon_path} is older than {pickle_path} and is ignored. "
+                      "Run build_morph_lexicon to convert the dictionaries again.")
+        return False
+    return True
+
+
+def preload(names=None):
+    """
+    Loads the morphology dictionaries eagerly, e.g. to warm up a server before it starts handling requests.
+
+    Args:
+        names (:obj:`list`): The resources to load. If not specified, all the dictionaries are loaded.
+
+    **Example:**
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from sinatools import morphology
+        morphology.preload()
+
+        # only the lemmas dictionary used by morph_analyzer.analyze
+        morphology.preload(['lemmas'])
+    """
+    for name in (names if names is not None else _RESOURCE_FILES):
+        get_resource(name)
+
+
+def convert_resources(names=None):
+    """
+    Converts the pickled morphology dictionaries in the application data directory into memory-mapped lexicon files. Once converted, get_resource() opens the lexicon files instead of the pickles, so all the processes using them share one copy through the page cache.
+
+    Args:
+        names (:obj:`list`): The resources to convert. If not specified, all the dictionaries are converted.
+
+    Returns:
+        :obj:`list`: The paths of the written lexicon files.
+
+    **Example:**
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from sinatools import morphology
+        morphology.convert_resources()
+    """
+    paths = []
+    for name in (names if names is not None else _RESOURCE_FILES):
+        pickle_path = os.path.join(downloader.get_appdatadir(), _RESOURCE_FILES[name])
+        paths.append(convert_pickle(pickle_path, _lexicon_path(name)))
+        with _lock:
+            _resources.pop(name, None)
+    return paths
+
+
+def __getattr__(name):
+    if name in _LEGACY_NAMES:
+        return get_resource(_LEGACY_NAMES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
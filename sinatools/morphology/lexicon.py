@@ -0,0 +1,142 @@
+import mmap
+import os
+import pickle
+import struct
+from collections.abc import Mapping
+
+# File layout (all integers are little-endian unsigned 64-bit):
+#   magic | count | key offsets [count + 1] | value offsets [count + 1] | keys | values
+# Keys are UTF-8 encoded and sorted bytewise, which is the same as sorting by code point,
+# so a lookup is a binary search over the mapped keys. Each value is pickled separately
+# and only unpickled when its key is requested.
+_MAGIC = b'SINALEX1'
+_HEADER = struct.Struct('<8sQ')
+_OFFSET = struct.Struct('<Q')
+
+
+class MmapLexicon(Mapping):
+    """
+    A read-only dictionary stored in a flat file and queried in place through `mmap`.
+
+    Processes that open the same file share its pages through the operating system page cache, so a
+    lexicon used by many workers is held in memory once, and opening it costs almost nothing.
+    Use :func:`build_lexicon` to convert one of the pickled dictionaries into this format.
+
+    Args:
+        path (:obj:`str`): The path of the lexicon file.
+
+    **Example:**
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from sinatools.morphology.lexicon import MmapLexicon
+        lexicon = MmapLexicon('lemmas_dic.lex')
+        lexicon['ذهب']
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            raise ValueError(f'{path} is not a lexicon file')
+        self._key_offsets = _HEADER.size
+        self._value_offsets = self._key_offsets + (self._count + 1) * _OFFSET.size
+
+    def _offset(self, table, i):
+        return _OFFSET.unpack_from(self._mm, table + i * _OFFSET.size)[0]
+
+    def _key(self, i):
+        return self._mm[self._offset(self._key_offsets, i):self._offset(self._key_offsets, i + 1)]
+
+    def _find(self, key):
+        if not isinstance(key, str):
+            return -1
+        target = key.encode('utf-8')
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count and self._key(lo) == target:
+            return lo
+        return -1
+
+    def __contains__(self, key):
+        return self._find(key) >= 0
+
+    def __getitem__(self, key):
+        i = self._find(key)
+        if i < 0:
+            raise KeyError(key)
+        start = self._offset(self._value_offsets, i)
+        end = self._offset(self._value_offsets, i + 1)
+        return pickle.loads(self._mm[start:end])
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._key(i).decode('utf-8')
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        self._mm.close()
+
+
+def build_lexicon(dictionary, lexicon_path):
+    """
+    Writes a dictionary with string keys to a lexicon file that can be opened with :class:`MmapLexicon`.
+
+    Args:
+        dictionary (:obj:`dict`): The dictionary to convert, e.g. the content of `lemmas_dic.pickle`.
+        lexicon_path (:obj:`str`): The path of the lexicon file to write.
+
+    Returns:
+        :obj:`str`: The path of the written lexicon file.
+    """
+    items = sorted((key.encode('utf-8'), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+                   for key, value in dictionary.items())
+    count = len(items)
+    keys_start = _HEADER.size + 2 * (count + 1) * _OFFSET.size
+
+    key_offsets = [keys_start]
+    for key, _ in items:
+        key_offsets.append(key_offsets[-1] + len(key))
+    value_offsets = [key_offsets[-1]]
+    for _, value in items:
+        value_offsets.append(value_offsets[-1] + len(value))
+
+    tmp_path = lexicon_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, count))
+        f.write(struct.pack(f'<{count + 1}Q', *key_offsets))
+        f.write(struct.pack(f'<{count + 1}Q', *value_offsets))
+        for key, _ in items:
+            f.write(key)
+        for _, value in items:
+            f.write(value)
+    os.replace(tmp_path, lexicon_path)
+    return lexicon_path
+
+
+def convert_pickle(pickle_path, lexicon_path=None):
+    """
+    Converts one of the pickled morphology dictionaries into a lexicon file.
+
+    Args:
+        pickle_path (:obj:`str`): The path of the pickle file, e.g. `lemmas_dic.pickle`.
+        lexicon_path (:obj:`str`): The path of the lexicon file. If not specified, the pickle path with a `.lex` extension is used.
+
+    Returns:
+        :obj:`str`: The path of the written lexicon file.
+    """
+    if lexicon_path is None:
+        lexicon_path = os.path.splitext(pickle_path)[0] + '.lex'
+    with open(pickle_path, 'rb') as f:
+        dictionary = pickle.load(f, encoding='utf-8')
+    return build_lexicon(dictionary, lexicon_path)
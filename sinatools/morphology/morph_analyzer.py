@@ -1,14 +1,109 @@
 import re
+import threading
+from collections import OrderedDict
 from sinatools.utils.tokenizers_words import simple_word_tokenize
 from sinatools.utils.parser import arStrip
 from sinatools.utils.charsets import AR_CHARSET, AR_DIAC_CHARSET
 from sinatools.DataDownload.downloader import get_appdatadir
 from sinatools.utils.parser import remove_punctuation
-from . import dictionary
+from . import get_resource
 
 _IS_AR_RE = re.compile(u'^[' + re.escape(u''.join(AR_CHARSET)) + u']+$')
 
+# Fully normalized form -> lemmas_dic keys with that form, see build_variant_index
+_variant_index = None
+
+
+class SolutionCache:
+    """
+    A bounded cache of the morphological solutions of normalized tokens, keyed by (token, flag).
+
+    Args:
+        max_size (:obj:`int`): The maximum number of cached tokens. Use 0 to disable the cache.
+        policy (:obj:`str`): The eviction policy when the cache is full. Options are [lru, fifo]: `lru` evicts the least recently used token, `fifo` evicts the oldest cached token.
+    """
+
+    def __init__(self, max_size=10000, policy='lru'):
+        if policy not in ('lru', 'fifo'):
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        self.max_size = max_size
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            solutions = self._entries.get(key)
+            if solutions is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                if self.policy == 'lru':
+                    self._entries.move_to_end(key)
+            return solutions
+
+    def put(self, key, solutions):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = solutions
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'size': len(self._entries), 'max_size': self.max_size, 'policy': self.policy}
+
+
+_cache = SolutionCache()
+
+
+def configure_cache(max_size=10000, policy='lru'):
+    """
+    Replaces the cache that :func:`analyze` and :func:`analyze_batch` keep in front of the per-token analysis. Solutions are cached per normalized token and flag, so a repeated token skips the normalization and fallback lookups.
+
+    Args:
+        max_size (:obj:`int`): The maximum number of cached tokens (default is 10000). Use 0 to disable the cache.
+        policy (:obj:`str`): The eviction policy, `lru` or `fifo` (default is `lru`).
+
+    **Example:**
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from sinatools.morphology import morph_analyzer
+        morph_analyzer.configure_cache(max_size=50000)
+        morph_analyzer.analyze('ذهب الولد الى المدرسة')
+        print(morph_analyzer.cache_info())
+
+        #output
+        {'hits': 0, 'misses': 4, 'evictions': 0, 'size': 4, 'max_size': 50000, 'policy': 'lru'}
+    """
+    global _cache
+    _cache = SolutionCache(max_size, policy)
+
+
+def cache_info():
+    """
+    Returns the statistics of the token cache used by :func:`analyze`.
+
+    Returns:
+        :obj:`dict`: The number of hits, misses and evictions, the current size, the maximum size and the eviction policy of the cache.
+    """
+    return _cache.info()
+
 def find_solution(token, language, flag):    
+    dictionary = get_resource('lemmas')
     if token in dictionary.keys():
         resulted_solutions = [] 
         solutions = dictionary[token]
@@ -95,57 +190,166 @@ def analyze(text, language ='MSA', task ='full', flag="1"):
    tokens = simple_word_tokenize(text)
 
    for token in tokens:
-         result_token = []
-         token = arStrip(token , False , True , False , False , False , False) 
-         token = re.sub('[ٱ]','ﺍ',token)
-         # token, freq, lemma, lemma_id, root, pos
-         solution = [token, 0, token, 0, token, ""]
-
-         if token.isdigit():
-            solution[5] = "رقم" #pos
-
-         elif remove_punctuation(token).strip() == "":
-            solution[5] = "علامة ترقيم" #pos
-
-         elif not _is_ar(token):
-            solution[5] = "أجنبي" #pos
-
-         else:
-            result_token = find_solution(token,language,flag)
-            
-            if result_token == []:
-               token_without_al = re.sub(r'^[ﻝ]','',re.sub(r'^[ﺍ]','',token))
-               if len(token_without_al) > 5  :
-                  result_token = find_solution(token_without_al, language, flag)
-
-            if result_token == []:
-              # try with replace ﻩ with ﺓ
-               result_token = find_solution(re.sub(r'[ﻩ]$','ﺓ',token), language, flag)
-               
-
-            if result_token == []:
-               # try with unify Alef
-               word_with_unify_alef = arStrip(token , False , False , False , False , True , False) # Unify Alef
-               result_token = find_solution(word_with_unify_alef, language, flag)
-            
-            if result_token == []:
-               # try with remove diac
-               word_undiac = arStrip(token , True , False , True , True , False , False) # remove diacs, shaddah ,  digit
-               result_token = find_solution(word_undiac, language, flag)
-
-            if result_token == []:
-               # try with remove diac and unify alef
-               word_undiac = arStrip(token , True , True , True , False, True , False) # diacs , smallDiacs , shaddah ,  alif
-               result_token = find_solution(word_undiac, language, flag)
-
-         if result_token != []:
-               output_list += result_token
-         else:
-            output_list += [solution]
+         output_list += _analyze_token(token, language, flag)
         
    return filter_results(output_list, task)
 
 
+def analyze_batch(texts, language ='MSA', task ='full', flag="1"):
+   """
+    This method runs the morphological analysis of :func:`analyze` over a list of texts in one call. The texts are tokenized together and each distinct token in the whole batch is normalized and looked up only once, which is much faster than calling `analyze` per text on real corpora where most tokens repeat.
+
+    Parameters:
+        texts (:obj:`list`): The Arabic texts to be morphologically analyzed.
+        language (:obj:`str`): Currently, only Modern Standard Arabic (MSA) is supported.
+        task (:obj:`str`): The task to filter the results by. Options are [lemmatization, pos, root, full]. The default task if not specified is `full`.
+        flag (:obj:`str`):  The flag to filter the returned results. If the flag is `1`, the solution with the highest frequency will be returned. If the flag is `*`, all solutions will be returned, ordered descendingly, with the highest frequency solution first. The default flag if not specified is `1`.
+
+    Returns:
+        list (:obj:`list`): A list with one entry per input text, in the same order, each entry being the list of JSON objects that `analyze` returns for that text.
+
+    **Example:**
+
+     .. highlight:: python
+     .. code-block:: python
+
+        from sinatools.morphology.morph_analyzer import analyze_batch
+        analyze_batch(['ذهب الولد الى المدرسة', 'الولد في المدرسة'], task='lemmatization')
+
+   """
+   tokenized_texts = [simple_word_tokenize(text) for text in texts]
+
+   solutions = {}
+   for tokens in tokenized_texts:
+         for token in tokens:
+               if token not in solutions:
+                     solutions[token] = _analyze_token(token, language, flag)
+
+   output = []
+   for tokens in tokenized_texts:
+         output_list = []
+         for token in tokens:
+               output_list += solutions[token]
+         output.append(filter_results(output_list, task))
+   return output
+
+
+def _analyze_token(token, language, flag):
+    token = arStrip(token , False , True , False , False , False , False) 
+    token = re.sub('[ٱ]','ﺍ',token)
+
+    cache = _cache
+    cached = cache.get((token, flag))
+    if cached is not None:
+       return cached
+
+    solutions = _solve_token(token, language, flag)
+    cache.put((token, flag), solutions)
+    return solutions
+
+
+def _solve_token(token, language, flag):
+    result_token = []
+    # token, freq, lemma, lemma_id, root, pos
+    solution = [token, 0, token, 0, token, ""]
+
+    if token.isdigit():
+       solution[5] = "رقم" #pos
+
+    elif remove_punctuation(token).strip() == "":
+       solution[5] = "علامة ترقيم" #pos
+
+    elif not _is_ar(token):
+       solution[5] = "أجنبي" #pos
+
+    else:
+       result_token = find_solution(token,language,flag)
+       
+       if result_token == []:
+          token_without_al = re.sub(r'^[ﻝ]','',re.sub(r'^[ﺍ]','',token))
+          if len(token_without_al) > 5  :
+             result_token = find_solution(token_without_al, language, flag)
+
+       if result_token == []:
+         # try with replace ﻩ with ﺓ
+          result_token = find_solution(re.sub(r'[ﻩ]$','ﺓ',token), language, flag)
+          
+
+       if result_token == []:
+          result_token = _find_variant(token, language, flag)
+
+    if result_token != []:
+       return result_token
+    return [solution]
+
+
+def _find_variant(token, language, flag):
+    # the fallbacks, in order: unify alef, remove diacs, remove diacs and unify alef
+    variants = [
+        lambda: arStrip(token , False , False , False , False , True , False), # Unify Alef
+        lambda: arStrip(token , True , False , True , True , False , False), # remove diacs, shaddah ,  digit
+        lambda: arStrip(token , True , True , True , False, True , False), # diacs , smallDiacs , shaddah ,  alif
+    ]
+
+    if _variant_index is None:
+       for variant in variants:
+          result_token = find_solution(variant(), language, flag)
+          if result_token != []:
+             return result_token
+       return []
+
+    # An Arabic token has no digits, so its fully normalized form is the last fallback.
+    # Each fallback only strips or unifies characters, so the dictionary keys it can
+    # produce are the keys with the same normalized form
+    key = variants[2]()
+    forms = _variant_index.get(key)
+    if forms is None:
+       return []
+
+    # Usually the only key with this form is the normalized form itself, which is then
+    # the first fallback found in the dictionary
+    if forms == (key,):
+       return find_solution(key, language, flag)
+
+    for variant in variants:
+       word = key if variant is variants[2] else variant()
+       if word in forms:
+          result_token = find_solution(word, language, flag)
+          if result_token != []:
+             return result_token
+    return []
+
+
+def build_variant_index():
+    """
+    Builds the normalization-variant index used by :func:`analyze` and :func:`analyze_batch` to resolve the normalization fallbacks (unify alef, remove diacritics, and both) with one lookup in the index and one in the lemmas dictionary.
+
+    The index maps the fully normalized form (no diacritics, small diacritics, shaddah or digits, unified alef) of every dictionary key to the dictionary keys with that form. Each fallback only strips or unifies characters, so the keys it can reach are the ones listed under the normalized form of the token: tokens without any are resolved with a single lookup, and the others only check the fallbacks against those keys, in the same order, so the results of the analysis do not change. Building the index goes once over the whole dictionary, so it is optional and is meant to be called once at startup.
+
+    Returns:
+        :obj:`dict`: The index, from each normalized form to a tuple of dictionary keys.
+
+    **Example:**
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from sinatools.morphology import morph_analyzer
+        morph_analyzer.build_variant_index()
+        morph_analyzer.analyze('الولد ذهب الى المدرسه')
+    """
+    global _variant_index
+    index = {}
+    for key in get_resource('lemmas'):
+        index.setdefault(_variant_key(key), []).append(key)
+    _variant_index = {form: tuple(keys) for form, keys in index.items()}
+    return _variant_index
+
+
+def _variant_key(token):
+    return arStrip(token, True, True, True, True, True, False)
+
+
 def filter_results(data, task):
     filtered_data = []
     # token, freq, lemma, lemma_id, root, pos
@@ -28,9 +28,10 @@ with open(args_path, "r") as fh:
     train_config.__dict__ = json.load(fh)
 
 model = load_object(train_config.network_config["fn"], train_config.network_config["kwargs"])
-model = torch.nn.DataParallel(model)
 
+# DataParallel only helps on GPUs, on CPU it adds a wrapper around every forward pass
 if torch.cuda.is_available():
+    model = torch.nn.DataParallel(model)
     model = model.cuda()
 
 train_config.trainer_config["kwargs"]["model"] = model
@@ -93,32 +93,67 @@ def text2segments(text):
     return dataset, segment_vocab
 
 
+def texts2segments(texts):
+    """
+    Convert a list of texts to a dataset with one segment per text. Unlike text2segments,
+    the tokens are not indexed, inference does not use a token vocab
+    """
+    return [[Token(text=token, gold_tag=["O"]) for token in simple_word_tokenize(text)]
+            for text in texts]
+
+
 def get_dataloaders(
-    datasets, vocab, data_config, batch_size=32, num_workers=0, shuffle=(True, False, False)
+    datasets, vocab, data_config, batch_size=32, num_workers=0, shuffle=(True, False, False),
+    pin_memory=False, prefetch_factor=None, persistent_workers=False
 ):
     """
     From the datasets generate the dataloaders
     :param datasets: list - list of the datasets, list of list of segments and tokens
     :param batch_size: int
-    :param num_workers: int
+    :param num_workers: int - number of worker processes that transform the segments
     :param shuffle: boolean - to shuffle the data or not
+    :param pin_memory: boolean - copy the batches to pinned memory, for faster transfer to the GPU
+    :param prefetch_factor: int - number of batches loaded in advance by each worker
+    :param persistent_workers: boolean - keep the workers alive between epochs
     :return: List[torch.utils.data.DataLoader]
     """
     dataloaders = list()
+    options = dataloader_options(num_workers, pin_memory, prefetch_factor, persistent_workers)
 
     for i, examples in enumerate(datasets):
-        data_config["kwargs"].update({"examples": examples, "vocab": vocab})
-        dataset = load_object(data_config["fn"], data_config["kwargs"])
+        # data_config is shared, the dataset arguments are built in a new dict
+        kwargs = dict(data_config["kwargs"], examples=examples, vocab=vocab)
+        dataset = load_object(data_config["fn"], kwargs)
 
         dataloader = DataLoader(
             dataset=dataset,
             shuffle=shuffle[i],
             batch_size=batch_size,
-            num_workers=num_workers,
             collate_fn=dataset.collate_fn,
+            **options,
         )
 
         logger.info("%s batches found", len(dataloader))
         dataloaders.append(dataloader)
 
     return dataloaders
+
+
+def dataloader_options(num_workers=0, pin_memory=False, prefetch_factor=None, persistent_workers=False):
+    """
+    DataLoader arguments for the given worker and memory options. The options that the
+    DataLoader only accepts with worker processes are left out when num_workers is 0
+    :param num_workers: int - number of worker processes
+    :param pin_memory: boolean - copy the batches to pinned memory
+    :param prefetch_factor: int - number of batches loaded in advance by each worker
+    :param persistent_workers: boolean - keep the workers alive between iterations
+    :return: dict
+    """
+    options = {"num_workers": num_workers, "pin_memory": pin_memory}
+
+    if num_workers > 0:
+        options["persistent_workers"] = persistent_workers
+        if prefetch_factor is not None:
+            options["prefetch_factor"] = prefetch_factor
+
+    return options
@@ -1,4 +1,8 @@
+import os
+import json
+import pickle
 import logging
+import numpy as np
 import torch
 from torch.utils.data import Dataset
 from torch.nn.utils.rnn import pad_sequence
@@ -11,25 +15,22 @@ logger = logging.getLogger(__name__)
 
 
 class Token:
-    def __init__(self, text=None, pred_tag=None, gold_tag=None):
+    __slots__ = ("text", "gold_tag", "pred_tag", "subwords", "first_subword")
+
+    def __init__(self, text=None, pred_tag=None, gold_tag=None, first_subword=True):
         """
         Token object to hold token attributes
         :param text: str
         :param pred_tag: str
         :param gold_tag: str
+        :param first_subword: bool - False for the placeholders of the subwords after
+                              the first one, and of the [CLS] and [SEP] subwords
         """
         self.text = text
         self.gold_tag = gold_tag
         self.pred_tag = pred_tag
         self.subwords = None
-
-    @property
-    def subwords(self):
-        return self._subwords
-
-    @subwords.setter
-    def subwords(self, value):
-        self._subwords = value
+        self.first_subword = first_subword
 
     def __str__(self):
         """
@@ -54,6 +55,8 @@ class DefaultDataset(Dataset):
         vocab=None,
         bert_model="aubmindlab/bert-base-arabertv2",
         max_seq_len=512,
+        transform=None,
+        fast_tokenizer=False,
     ):
         """
         The dataset that used to transform the segments into training data
@@ -62,8 +65,11 @@ class DefaultDataset(Dataset):
         :param vocab: vocab object containing indexed tags and tokens
         :param bert_model: str - BERT model
         :param: int - maximum sequence length
+        :param transform: BertSeqTransform - an already loaded transform to reuse instead of
+                          loading the BERT tokenizer again
+        :param fast_tokenizer: boolean - encode the segments with the fast (Rust) BERT tokenizer
         """
-        self.transform = BertSeqTransform(bert_model, vocab, max_seq_len=max_seq_len)
+        self.transform = transform or BertSeqTransform(bert_model, vocab, max_seq_len=max_seq_len, fast_tokenizer=fast_tokenizer)
         self.examples = examples
         self.vocab = vocab
 
@@ -99,18 +105,33 @@ class NestedTagsDataset(Dataset):
         vocab=None,
         bert_model="aubmindlab/bert-base-arabertv2",
         max_seq_len=512,
+        transform=None,
+        fast_tokenizer=False,
     ):
         """
         The dataset that used to transform the segments into training data
         :param examples: list[[tuple]] - [[(token, tag), (token, tag), ...], [(token, tag), ...]]
                          You can get generate examples from -- arabiner.data.dataset.parse_conll_files
+                         or str - path of a directory written by pretokenize(), the segments are then
+                         read from it already transformed and the BERT tokenizer is not loaded
         :param vocab: vocab object containing indexed tags and tokens
         :param bert_model: str - BERT model
         :param: int - maximum sequence length
+        :param transform: NestedTagsTransform - an already loaded transform to reuse instead of
+                          loading the BERT tokenizer again
+        :param fast_tokenizer: boolean - encode the segments with the fast (Rust) BERT tokenizer
         """
-        self.transform = NestedTagsTransform(
-            bert_model, vocab, max_seq_len=max_seq_len
-        )
+        self.cache = None
+
+        if isinstance(examples, (str, os.PathLike)):
+            self.cache = PretokenizedSegments(examples, vocab)
+            self.transform = transform
+            examples = self.cache.examples
+        else:
+            self.transform = transform or NestedTagsTransform(
+                bert_model, vocab, max_seq_len=max_seq_len, fast_tokenizer=fast_tokenizer
+            )
+
         self.examples = examples
         self.vocab = vocab
 
@@ -118,8 +139,11 @@ class NestedTagsDataset(Dataset):
         return len(self.examples)
 
     def __getitem__(self, item):
-        subwords, tags, tokens, masks, valid_len = self.transform(self.examples[item])
-        return subwords, tags, tokens, masks, valid_len
+        if self.cache is not None:
+            return self.cache[item]
+
+        subwords, tags, tokens, masks, valid_len, first_subword = self.transform(self.examples[item])
+        return subwords, tags, tokens, masks, valid_len, first_subword
 
     def collate_fn(self, batch):
         """
@@ -127,7 +151,7 @@ class NestedTagsDataset(Dataset):
         :param batch: Dataloader batch
         :return: Same output as the __getitem__ function
         """
-        subwords, tags, tokens, masks, valid_len = zip(*batch)
+        subwords, tags, tokens, masks, valid_len, first_subword = zip(*batch)
 
         # Pad sequences in this batch
         # subwords and tokens are padded with zeros
@@ -143,4 +167,105 @@ class NestedTagsDataset(Dataset):
                 for tag, vocab in zip(tags, self.vocab.tags[1:])]
         tags = torch.cat(tags)
 
-        return subwords, tags, tokens, masks, valid_len
+        # B x T first subword flags. A token without subwords still has an entry in the
+        # segment, so the flags of a segment can be longer than its subwords
+        first_subwords = torch.zeros(subwords.shape, dtype=torch.bool)
+        for i, flags in enumerate(first_subword):
+            n = min(len(flags), subwords.shape[-1])
+            first_subwords[i, :n] = flags[:n]
+
+        return subwords, tags, tokens, masks, valid_len, first_subwords
+
+
+def pretokenize(examples, vocab, output_dir, bert_model="aubmindlab/bert-base-arabertv2", max_seq_len=512, transform=None,
+                fast_tokenizer=False):
+    """
+    Run the NestedTagsTransform once over the segments and save the result, so that
+    NestedTagsDataset can read the segments already transformed instead of encoding them
+    again every epoch. The subword IDs, the tag matrices and the first subword flags of all
+    the segments are concatenated in .npy files that are memory-mapped when loaded, with the
+    offset of each segment in offsets.npy (tags and first subword flags, one row per token
+    entry) and subword_offsets.npy (subword IDs). A token without subwords still has a token
+    entry and a tag, so a segment can have more token entries than subwords
+    :param examples: list[[Token]] - the segments, e.g. one of the datasets returned by parse_conll_files
+    :param vocab: vocab object containing indexed tags and tokens
+    :param output_dir: str - directory where the files are written
+    :param bert_model: str - BERT model
+    :param max_seq_len: int - maximum sequence length
+    :param transform: NestedTagsTransform - an already loaded transform to reuse
+    :param fast_tokenizer: boolean - encode the segments with the fast (Rust) BERT tokenizer
+    :return: str - output_dir
+    """
+    transform = transform or NestedTagsTransform(bert_model, vocab, max_seq_len=max_seq_len, fast_tokenizer=fast_tokenizer)
+    os.makedirs(output_dir, exist_ok=True)
+
+    subwords, tags, first_subword, offsets, subword_offsets = list(), list(), list(), [0], [0]
+    for segment in examples:
+        segment_subwords, segment_tags, tokens, _, _, segment_first_subword = transform(segment)
+        subwords.append(segment_subwords.numpy().astype(np.int32))
+        tags.append(segment_tags[0].numpy().T.astype(np.int16))
+        first_subword.append(segment_first_subword.numpy())
+        offsets.append(offsets[-1] + len(tokens))
+        subword_offsets.append(subword_offsets[-1] + len(segment_subwords))
+
+    num_tag_types = len(vocab.tags) - 1
+    np.save(os.path.join(output_dir, "subwords.npy"), np.concatenate(subwords or [np.zeros(0, np.int32)]))
+    np.save(os.path.join(output_dir, "tags.npy"), np.concatenate(tags or [np.zeros((0, num_tag_types), np.int16)]))
+    np.save(os.path.join(output_dir, "first_subword.npy"), np.concatenate(first_subword or [np.zeros(0, bool)]))
+    np.save(os.path.join(output_dir, "offsets.npy"), np.array(offsets, dtype=np.int64))
+    np.save(os.path.join(output_dir, "subword_offsets.npy"), np.array(subword_offsets, dtype=np.int64))
+
+    # The tokens are needed to attach the predictions and compute the metrics
+    segments = [[Token(text=token.text, gold_tag=token.gold_tag) for token in segment] for segment in examples]
+    with open(os.path.join(output_dir, "segments.pkl"), "wb") as fh:
+        pickle.dump(segments, fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+    with open(os.path.join(output_dir, "meta.json"), "w") as fh:
+        json.dump({"tags": [tag_vocab.get_itos() for tag_vocab in vocab.tags[1:]]}, fh)
+
+    logger.info("%d segments saved to %s", len(segments), output_dir)
+    return output_dir
+
+
+class PretokenizedSegments:
+    def __init__(self, path, vocab):
+        """
+        Segments transformed by pretokenize(), indexed like NestedTagsDataset and returning
+        the same items as NestedTagsTransform
+        :param path: str - directory written by pretokenize()
+        :param vocab: vocab object containing indexed tags and tokens, the tag vocabs must be
+                      the ones used to write the directory
+        """
+        with open(os.path.join(path, "meta.json")) as fh:
+            tags = json.load(fh)["tags"]
+
+        if tags != [tag_vocab.get_itos() for tag_vocab in vocab.tags[1:]]:
+            raise ValueError(f"{path} was written with different tag vocabs")
+
+        self.subwords = np.load(os.path.join(path, "subwords.npy"), mmap_mode="r")
+        self.tags = np.load(os.path.join(path, "tags.npy"), mmap_mode="r")
+        self.first_subword = np.load(os.path.join(path, "first_subword.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"))
+        self.subword_offsets = np.load(os.path.join(path, "subword_offsets.npy"))
+
+        with open(os.path.join(path, "segments.pkl"), "rb") as fh:
+            self.examples = pickle.load(fh)
+
+    def __len__(self):
+        return len(self.examples)
+
+    def __getitem__(self, item):
+        start, end = self.offsets[item], self.offsets[item + 1]
+        subwords = self.subwords[self.subword_offsets[item]:self.subword_offsets[item + 1]]
+        subwords = torch.from_numpy(subwords.astype(np.int64))
+        tags = torch.from_numpy(self.tags[start:end].T.astype(np.float32)).unsqueeze(0)
+
+        # Rebuild the tokens, with a placeholder for the [CLS] and [SEP] subwords and
+        # for the subwords after the first one of each token
+        unk_token = Token(text="UNK", first_subword=False)
+        segment = iter(self.examples[item])
+        first_subword = np.array(self.first_subword[start:end])
+        tokens = [next(segment) if first else unk_token for first in first_subword]
+
+        mask = torch.ones_like(tags)
+        return subwords, tags, tokens, mask, len(tokens), torch.from_numpy(first_subword)
@@ -1,8 +1,13 @@
 import os
 from collections import namedtuple
-from sinatools.ner.data_format import get_dataloaders, text2segments
+from torch.utils.data import DataLoader, Dataset
+from sinatools.ner.data_format import texts2segments, dataloader_options
+from sinatools.ner.helpers import load_object
+from sinatools.ner.datasets import Token
 from . import tagger, tag_vocab, train_config
 
+Vocab = namedtuple("Vocab", ["tags", "tokens"])
+
 
 def convert_nested_to_flat(nested_tags):
     flat_tags = []
@@ -70,21 +75,211 @@ def extract(text, ner_method="nested"):
         }]    
     """
 
-    dataset, token_vocab = text2segments(text)
+    return _get_default_session().extract(text, ner_method)
+
+
+def extract_batch(texts, ner_method="nested", batch_size=None):
+    """
+    This method tags a list of texts like :func:`extract`, but runs them through the model together in batches. The texts are sorted by length and each batch is only padded to its longest text, which is much faster than calling `extract` once per text.
+
+    Args:
+        * texts (:obj:`list`) – The Arabic texts to be tagged.
+        * ner_method (:obj:`str`) – The NER method, nested or flat. The default method is nested.
+        * batch_size (:obj:`int`) – The number of texts per batch. The default is the batch size of the session (32).
+
+    Returns:
+        A list with one entry per input text, in the same order, each entry being the list of JSON objects that `extract` returns for that text.
+
+    **Example:**
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from sinatools.ner.entity_extractor import extract_batch
+        extract_batch(['ذهب محمد الى جامعة بيرزيت', 'في فلسطين'])
+    """
+    return _get_default_session().extract_batch(texts, ner_method, batch_size)
+
+
+class NERSession:
+    """
+    A reusable NER inference session. The BERT tokenizer, the transform that encodes the segments and the model are loaded once when the session is created and reused by every call to :meth:`extract`. :func:`extract` uses a default session created on its first call; create your own session to change the batch size or the model.
+
+    Args:
+        * tagger – The trainer that holds the model. Defaults to the model loaded by `sinatools.ner`.
+        * tag_vocab – The tag vocabularies of the model. Defaults to the ones loaded by `sinatools.ner`.
+        * train_config – The training configuration of the model. Defaults to the one loaded by `sinatools.ner`.
+        * batch_size (:obj:`int`) – The number of segments per batch (default is 32).
+        * window_overlap (:obj:`int`) – Texts longer than the model input (512 subwords) are tagged in overlapping windows, which are batched together. This is the number of subwords shared by two consecutive windows (default is 128). In the overlap, each token keeps the prediction with the highest probability.
+        * fast_tokenizer (:obj:`bool`) – Split the texts into subwords with the fast (Rust) BERT tokenizer, one call per segment, instead of the Python tokenizer called once per word (default is False).
+        * num_workers (:obj:`int`) – The number of worker processes that tokenize the segments while the model tags the previous batches (default is 0, the segments are tokenized in the calling process). The workers are started for every call, so they only pay off for large :meth:`extract_batch` calls, not for :meth:`extract`.
+        * pin_memory (:obj:`bool`) – Copy the batches to pinned memory, for faster transfer to the GPU (default is False).
+        * prefetch_factor (:obj:`int`) – The number of batches tokenized in advance by each worker (default is the PyTorch default).
+
+    **Example:**
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from sinatools.ner.entity_extractor import NERSession
+        session = NERSession()
+        session.extract('ذهب محمد الى جامعة بيرزيت')
+        session.extract('ذهب محمد الى جامعة بيرزيت', ner_method='flat')
+    """
+
+    def __init__(self, tagger=tagger, tag_vocab=tag_vocab, train_config=train_config, batch_size=32, window_overlap=128,
+                 fast_tokenizer=False, num_workers=0, pin_memory=False, prefetch_factor=None):
+        self.tagger = tagger
+        self.tag_vocab = tag_vocab
+        self.train_config = train_config
+        self.batch_size = batch_size
+        self.window_overlap = window_overlap
+        self.num_workers = num_workers
+        self.loader_options = dataloader_options(num_workers, pin_memory, prefetch_factor)
+
+        # The transform, and the tokenizer it loads, only depend on the tag vocabs
+        dataset = self._load_dataset([], Vocab(tokens=None, tags=tag_vocab), fast_tokenizer=fast_tokenizer)
+        self.transform = dataset.transform
+
+    def extract(self, text, ner_method="nested"):
+        """
+        Same as :func:`extract`, using the resources loaded by the session.
+        """
+        segments = self._tag_segments(texts2segments([text]), self.batch_size)
+        return _segments_to_json(segments, ner_method)
+
+    def extract_batch(self, texts, ner_method="nested", batch_size=None):
+        """
+        Same as :func:`extract_batch`, using the resources loaded by the session.
+        """
+        segments = self._tag_segments(texts2segments(texts), batch_size or self.batch_size)
+        return [_segments_to_json([segment], ner_method) for segment in segments]
+
+    def _tag_segments(self, segments, batch_size):
+        # Segments longer than the model input are split into overlapping windows,
+        # each window holding its own copies of the tokens
+        windows, origins = list(), list()
+        for segment in segments:
+            for start, end in self._windows(segment):
+                windows.append([Token(text=token.text, gold_tag=token.gold_tag) for token in segment[start:end]])
+                origins.append(segment[start:end])
+
+        dataset = self._load_dataset(windows, Vocab(tokens=None, tags=self.tag_vocab), transform=self.transform)
+
+        # Bucket the windows by length so that each batch is padded to a similar length.
+        # Without workers, the windows are transformed upfront and sorted by their number of
+        # subwords. Workers transform the windows while the model runs, so the number of
+        # characters is used as an estimate of the number of subwords
+        if self.num_workers:
+            order = sorted(range(len(windows)), key=lambda i: sum(len(token.text) for token in windows[i]))
+        else:
+            dataset = _TransformedDataset(dataset)
+            order = sorted(range(len(dataset)), key=dataset.num_subwords)
+
+        dataloader = DataLoader(
+            dataset=dataset,
+            batch_sampler=[order[i:i + batch_size] for i in range(0, len(order), batch_size)],
+            collate_fn=dataset.collate_fn,
+            **self.loader_options,
+        )
+
+        # Copy the predictions back to the tokens of the segments
+        predicted = _merge_predictions(self.tagger.infer(dataloader), [origins[i] for i in order])
+
+        return [[token for token in segment if id(token) in predicted] for segment in segments]
+
+    def _windows(self, segment):
+        """
+        Split a segment into windows of at most max_seq_len - 2 subwords, where each window
+        starts window_overlap subwords before the end of the previous one
+        """
+        max_len = self.transform.max_seq_len - 2
+
+        # A subword covers at least one character, so most segments can be kept whole
+        # without encoding them
+        if sum(len(token.text) for token in segment) <= max_len:
+            return [(0, len(segment))]
+
+        lengths = [len(self.transform.encoder(token.text)) - 2 for token in segment]
+        windows, start = list(), 0
+        while True:
+            end, size = start, 0
+            while end < len(segment) and size + lengths[end] <= max_len:
+                size += lengths[end]
+                end += 1
+            # A single token longer than a window is truncated by the transform
+            end = max(end, start + 1)
+            windows.append((start, end))
+            if end >= len(segment):
+                return windows
+
+            # The overlap leaves room for the token after the window, so that each window
+            # ends after the previous one
+            next_start, size = end, 0
+            while (next_start > start + 1 and size + lengths[next_start - 1] <= self.window_overlap
+                   and size + lengths[next_start - 1] + lengths[end] <= max_len):
+                next_start -= 1
+                size += lengths[next_start]
+            start = next_start
+
+    def _load_dataset(self, examples, vocab, **kwargs):
+        data_config = self.train_config.data_config
+        kwargs = dict(data_config["kwargs"], examples=examples, vocab=vocab, **kwargs)
+        return load_object(data_config["fn"], kwargs)
+
+
+def _merge_predictions(tagged_windows, origins):
+    """
+    Copy the predictions of the windows to the tokens of the segments. The tagged tokens of a
+    window are the first tokens of the window, in order (the transform may truncate it). A
+    token seen by two windows keeps, for each tag type, the prediction with the highest
+    probability
+    :param tagged_windows: list[[Token]] - the tagged tokens of each window
+    :param origins: list[[Token]] - the tokens of the segment covered by each window
+    :return: set - the ids of the tokens of the segments that got a prediction
+    """
+    predicted = set()
+    for window, tokens in zip(tagged_windows, origins):
+        for copy, token in zip(window, tokens):
+            if id(token) in predicted:
+                token.pred_tag = [max(old, new, key=lambda tag: tag.get("score", 0))
+                                  for old, new in zip(token.pred_tag, copy.pred_tag)]
+            else:
+                token.pred_tag = copy.pred_tag
+                predicted.add(id(token))
+    return predicted
+
+
+class _TransformedDataset(Dataset):
+    """
+    Holds the examples of a dataset already transformed, so that they can be sorted by length
+    """
+    def __init__(self, dataset):
+        self.vocab = dataset.vocab
+        self.collate_fn = dataset.collate_fn
+        self.items = [dataset[i] for i in range(len(dataset))]
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, item):
+        return self.items[item]
+
+    def num_subwords(self, item):
+        return len(self.items[item][0])
+
+
+_default_session = None
 
-    vocabs = namedtuple("Vocab", ["tags", "tokens"])
-    vocab = vocabs(tokens=token_vocab, tags=tag_vocab)
 
-    dataloader = get_dataloaders(
-        (dataset,),
-        vocab,
-        train_config.data_config,
-        batch_size=32,
-        shuffle=(False,),
-    )[0]
+def _get_default_session():
+    global _default_session
+    if _default_session is None:
+        _default_session = NERSession()
+    return _default_session
 
 
-    segments = tagger.infer(dataloader)
+def _segments_to_json(segments, ner_method):
     segments_lists = []
     
     for segment in segments:
@@ -0,0 +1,157 @@
+import os
+import copy
+import logging
+from collections import namedtuple
+from types import SimpleNamespace
+import torch
+from torch import nn
+from torch.utils.data import DataLoader
+from sinatools.ner.data_format import conll_to_segments
+from sinatools.ner.helpers import load_object
+from sinatools.ner.metrics import compute_nested_metrics, compute_single_label_metrics
+from sinatools.ner.trainers import BertNestedTrainer
+
+logger = logging.getLogger(__name__)
+
+Vocab = namedtuple("Vocab", ["tags", "tokens"])
+
+
+def export_model(model, output_path, example_subwords, export_format="torchscript", quantize=True):
+    """
+    Export a tagger model (BertNestedTagger or BertSeqTagger) for CPU inference
+    :param model: torch.nn.Module - the model, possibly wrapped in DataParallel
+    :param output_path: str - path of the exported model, a .pt file for TorchScript or a .onnx file
+    :param example_subwords: torch.Tensor (B x T) - subword IDs used to trace the model
+    :param export_format: str - torchscript or onnx
+    :param quantize: boolean - quantize the weights of the linear layers to int8. The TorchScript model
+                     is quantized with torch dynamic quantization before it is traced, the ONNX model
+                     is quantized with onnxruntime after it is exported
+    :return: str - output_path
+    """
+    if isinstance(model, nn.DataParallel):
+        model = model.module
+
+    model = copy.deepcopy(model).cpu().eval()
+    example_subwords = example_subwords.cpu()
+    example_mask = torch.ones_like(example_subwords)
+
+    if export_format == "torchscript":
+        if quantize:
+            model = torch.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+        with torch.no_grad():
+            traced = torch.jit.trace(model, (example_subwords, example_mask), strict=False)
+        torch.jit.save(traced, output_path)
+    elif export_format == "onnx":
+        fp32_path = output_path + ".fp32" if quantize else output_path
+        torch.onnx.export(
+            model,
+            (example_subwords, example_mask),
+            fp32_path,
+            input_names=["subwords", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={"subwords": {0: "batch", 1: "sequence"},
+                          "attention_mask": {0: "batch", 1: "sequence"},
+                          "logits": {0: "batch", 1: "sequence"}},
+            opset_version=14,
+        )
+
+        if quantize:
+            try:
+                from onnxruntime.quantization import quantize_dynamic, QuantType
+            except ImportError:
+                raise ImportError("Quantizing the ONNX model requires onnxruntime. Install it with: pip install onnxruntime")
+            quantize_dynamic(fp32_path, output_path, weight_type=QuantType.QInt8)
+            os.remove(fp32_path)
+    else:
+        raise ValueError(f"Unknown export format {export_format}, expected torchscript or onnx")
+
+    logger.info("Model exported to %s", output_path)
+    return output_path
+
+
+class ExportedTagger(nn.Module):
+    def __init__(self, path, num_threads=None):
+        """
+        Run a model exported by export_model with the same interface as the tagger models,
+        so that it can replace the model of a trainer
+        :param path: str - a TorchScript (.pt) or ONNX (.onnx) file
+        :param num_threads: int - number of threads used by onnxruntime (default is onnxruntime's)
+        """
+        super().__init__()
+        self.path = path
+        self.module, self.session = None, None
+
+        if path.endswith(".onnx"):
+            try:
+                import onnxruntime
+            except ImportError:
+                raise ImportError("Running an ONNX model requires onnxruntime. Install it with: pip install onnxruntime")
+
+            options = onnxruntime.SessionOptions()
+            if num_threads:
+                options.intra_op_num_threads = num_threads
+            self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        else:
+            self.module = torch.jit.load(path, map_location="cpu")
+
+    def forward(self, x, attention_mask=None):
+        if attention_mask is None:
+            attention_mask = torch.ones_like(x)
+
+        if self.module is not None:
+            return self.module(x.cpu(), attention_mask.cpu())
+
+        logits, = self.session.run(None, {"subwords": x.cpu().numpy(), "attention_mask": attention_mask.cpu().numpy()})
+        return torch.from_numpy(logits)
+
+
+def exported_tagger(path, tagger, num_threads=None):
+    """
+    Copy of the trainer that runs an exported model instead of its model
+    :param path: str - a TorchScript (.pt) or ONNX (.onnx) file written by export_model
+    :param tagger: BaseTrainer - the trainer of the model, e.g. sinatools.ner.tagger
+    :param num_threads: int - number of threads used by onnxruntime
+    :return: BaseTrainer
+    """
+    exported = copy.copy(tagger)
+    exported.model = ExportedTagger(path, num_threads=num_threads)
+    return exported
+
+
+def check_parity(tagger, exported, conll_path, tag_vocab, train_config, batch_size=32):
+    """
+    Tag a held-out CoNLL file with the eager model and with the exported model, and compare
+    their predictions and their scores against the gold tags
+    :param tagger: BaseTrainer - the trainer of the eager model
+    :param exported: BaseTrainer - the trainer of the exported model, see exported_tagger
+    :param conll_path: str - CoNLL file, one token and its tags per line and an empty line between segments
+    :param tag_vocab: list - the tag vocabs of the model
+    :param train_config: Namespace - the training configuration of the model
+    :param batch_size: int
+    :return: SimpleNamespace - agreement (share of the token tags predicted identically by both models),
+             eager_f1 and exported_f1 (micro F1 of each model)
+    """
+    segments = [segment for segment in conll_to_segments(conll_path) if segment]
+    kwargs = dict(train_config.data_config["kwargs"], examples=segments, vocab=Vocab(tokens=None, tags=tag_vocab))
+    dataset = load_object(train_config.data_config["fn"], kwargs)
+    dataloader = DataLoader(dataset=dataset, batch_size=batch_size, shuffle=False, collate_fn=dataset.collate_fn)
+
+    # Both runs attach their predictions to the same tokens, so the tags and the scores
+    # of each run are collected before the next one
+    tags, f1 = list(), list()
+    for trainer in (tagger, exported):
+        tagged_segments = trainer.infer(dataloader)
+        tags.append([tag["tag"] for segment in tagged_segments for token in segment for tag in token.pred_tag])
+
+        if isinstance(tagger, BertNestedTrainer):
+            f1.append(compute_nested_metrics(tagged_segments, tag_vocab[1:]).micro_f1)
+        else:
+            f1.append(compute_single_label_metrics(tagged_segments).micro_f1)
+
+    same = sum(eager == exported for eager, exported in zip(*tags))
+    return SimpleNamespace(
+        agreement=same / len(tags[0]) if tags[0] else 1.0,
+        eager_f1=f1[0],
+        exported_f1=f1[1],
+    )
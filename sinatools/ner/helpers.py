@@ -84,3 +84,39 @@ def set_seed(seed):
     torch.backends.cudnn.deterministic = True
     torch.backends.cudnn.benchmark = False
     torch.backends.cudnn.enabled = False
+
+
+def tag_type_lookup(vocabs):
+    """
+    Map each entity tag (B-PERS, I-ORG, ...) of the tag vocabs to the index of its tag
+    type and its ID in the vocab of that type, so that the tags of a token can be split
+    by type with dictionary lookups. A tag found in the vocabs of several types belongs
+    to each of them
+
+    :param vocabs: list - one tag vocab per tag type, i.e. vocab.tags[1:]
+    :return: dict - {tag: [(type index, tag ID), ...]}
+    """
+    lookup = dict()
+    for i, vocab in enumerate(vocabs):
+        for tag_id, tag in enumerate(vocab.get_itos()):
+            if "-" in tag:
+                lookup.setdefault(tag, list()).append((i, tag_id))
+    return lookup
+
+
+def tags_by_type(tags, lookup, num_types):
+    """
+    Split the tags of a token by tag type. If a token has several tags of the same type
+    (i.e. B-ORG and I-ORG), the first one is kept
+
+    :param tags: list - the tags of the token
+    :param lookup: dict - returned by tag_type_lookup
+    :param num_types: int - number of tag types
+    :return: list - for each tag type, the ID of the first tag of that type, or None
+    """
+    type_tags = [None] * num_types
+    for tag in reversed(tags):
+        for i, tag_id in lookup.get(tag, ()):
+            type_tags[i] = tag_id
+    return type_tags
+
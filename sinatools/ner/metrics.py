@@ -8,7 +8,7 @@ from seqeval.metrics import (
 from seqeval.scheme import IOB2
 from types import SimpleNamespace
 import logging
-import re
+from sinatools.ner.helpers import tag_type_lookup, tags_by_type
 
 logger = logging.getLogger(__name__)
 
@@ -25,11 +25,20 @@ def compute_nested_metrics(segments, vocabs):
     # For each copy, we create y and y_hat
     # Example: first copy, will create pairs of ground truth and predicted labels for entity type GPE
     #          another copy will create pairs for LOC, etc.
-    for i, vocab in enumerate(vocabs):
-        vocab_tags = [tag for tag in vocab.get_itos() if "-" in tag]
-        r = re.compile("|".join(vocab_tags))
+    # Split the gold tags of each token by tag type once, with a lookup computed once per vocab
+    # If a token has several tags of the same type, the first one is kept
+    lookup = tag_type_lookup(vocabs)
+    itos = [vocab.get_itos() for vocab in vocabs]
+    gold_tags = list()
+    for segment in segments:
+        segment_tags = list()
+        for token in segment:
+            token_tags = tags_by_type(token.gold_tag, lookup, len(vocabs))
+            segment_tags.append(["O" if tag_id is None else names[tag_id] for tag_id, names in zip(token_tags, itos)])
+        gold_tags.append(segment_tags)
 
-        y += [[(list(filter(r.match, token.gold_tag)) or ["O"])[0] for token in segment] for segment in segments]
+    for i, vocab in enumerate(vocabs):
+        y += [[token_tags[i] for token_tags in segment_tags] for segment_tags in gold_tags]
         y_hat += [[token.pred_tag[i]["tag"] for token in segment] for segment in segments]
 
     logging.info("\n" + classification_report(y, y_hat, scheme=IOB2, digits=4))
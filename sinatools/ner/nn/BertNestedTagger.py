@@ -11,8 +11,8 @@ class BertNestedTagger(BaseModel):
         classifiers = [nn.Linear(768, num_labels) for num_labels in self.num_labels]
         self.classifiers = torch.nn.Sequential(*classifiers)
 
-    def forward(self, x):
-        y = self.bert(x)
+    def forward(self, x, attention_mask=None):
+        y = self.bert(x, attention_mask=attention_mask)
         y = self.dropout(y["last_hidden_state"])
         output = list()
 
@@ -10,8 +10,8 @@ class BertSeqTagger(nn.Module):
         self.dropout = nn.Dropout(dropout)
         self.linear = nn.Linear(768, num_labels)
 
-    def forward(self, x):
-        y = self.bert(x)
+    def forward(self, x, attention_mask=None):
+        y = self.bert(x, attention_mask=attention_mask)
         y = self.dropout(y["last_hidden_state"])
         logits = self.linear(y)
         return logits
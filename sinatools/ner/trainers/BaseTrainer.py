@@ -63,8 +63,9 @@ class BaseTrainer:
                 self.optimizer.zero_grad()
                 logits = self.model(subwords)
             else:
+                # Mask the padding so that each segment is tagged as if it was alone in the batch
                 with torch.no_grad():
-                    logits = self.model(subwords)
+                    logits = self.model(subwords, attention_mask=(subwords != 0).long())
 
             yield subwords, gold_tags, tokens, valid_len, logits
 
@@ -114,4 +115,11 @@ class BaseTrainer:
 
         device = None if torch.cuda.is_available() else torch.device('cpu')
         checkpoint = torch.load(checkpoint_path, map_location=device)
-        self.model.load_state_dict(checkpoint["model"], strict=False)
+
+        # Checkpoints saved from a DataParallel model prefix the parameter names with "module."
+        state_dict = checkpoint["model"]
+        if not isinstance(self.model, torch.nn.DataParallel):
+            state_dict = {(name[len("module."):] if name.startswith("module.") else name): value
+                          for name, value in state_dict.items()}
+
+        self.model.load_state_dict(state_dict, strict=False)
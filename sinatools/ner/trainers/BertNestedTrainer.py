@@ -22,7 +22,7 @@ class BertNestedTrainer(BaseTrainer):
             self.current_epoch = epoch_index
             train_loss = 0
 
-            for batch_index, (subwords, gold_tags, tokens, valid_len, logits) in enumerate(self.tag(
+            for batch_index, (subwords, gold_tags, tokens, valid_len, logits, _) in enumerate(self.tag(
                 self.train_dataloader, is_train=True
             ), 1):
                 self.current_timestep += 1
@@ -58,7 +58,7 @@ class BertNestedTrainer(BaseTrainer):
 
             logger.info("** Evaluating on validation dataset **")
             val_preds, segments, valid_len, val_loss = self.eval(self.val_dataloader)
-            val_metrics = compute_nested_metrics(segments, self.val_dataloader.dataset.transform.vocab.tags[1:])
+            val_metrics = compute_nested_metrics(segments, self.val_dataloader.dataset.vocab.tags[1:])
 
             epoch_summary_loss = {
                 "train_loss": train_loss,
@@ -85,7 +85,7 @@ class BertNestedTrainer(BaseTrainer):
                 logger.info("** Validation improved, evaluating test data **")
                 test_preds, segments, valid_len, test_loss = self.eval(self.test_dataloader)
                 self.segments_to_file(segments, os.path.join(self.output_path, "predictions.txt"))
-                test_metrics = compute_nested_metrics(segments, self.test_dataloader.dataset.transform.vocab.tags[1:])
+                test_metrics = compute_nested_metrics(segments, self.test_dataloader.dataset.vocab.tags[1:])
 
                 epoch_summary_loss["test_loss"] = test_loss
                 epoch_summary_metrics["test_micro_f1"] = test_metrics.micro_f1
@@ -123,8 +123,9 @@ class BertNestedTrainer(BaseTrainer):
                     tokens - List[arabiner.data.dataset.Token] - list of tokens
                     valid_len (B x 1) - int - valiud length of each sequence
                     logits (B x T x NUM_LABELS) - logits for each token and each tag
+                    first_subword (B x T) - torch.Tensor - True for the first subword of each token
         """
-        for subwords, gold_tags, tokens, mask, valid_len in dataloader:
+        for subwords, gold_tags, tokens, mask, valid_len, first_subword in dataloader:
             self.model.train(is_train)
 
             if torch.cuda.is_available():
@@ -135,69 +136,81 @@ class BertNestedTrainer(BaseTrainer):
                 self.optimizer.zero_grad()
                 logits = self.model(subwords)
             else:
+                # Mask the padding so that each segment is tagged as if it was alone in the batch
                 with torch.no_grad():
-                    logits = self.model(subwords)
+                    logits = self.model(subwords, attention_mask=(subwords != 0).long())
 
-            yield subwords, gold_tags, tokens, valid_len, logits
+            yield subwords, gold_tags, tokens, valid_len, logits, first_subword
 
     def eval(self, dataloader):
         golds, preds, segments, valid_lens = list(), list(), list(), list()
         num_labels = [len(v) for v in dataloader.dataset.vocab.tags[1:]]
         loss = 0
 
-        for _, gold_tags, tokens, valid_len, logits in self.tag(
+        for _, gold_tags, tokens, valid_len, logits, first_subword in self.tag(
             dataloader, is_train=False
         ):
             losses = [self.loss(logits[:, :, i, 0:l].view(-1, logits[:, :, i, 0:l].shape[-1]),
                                 torch.reshape(gold_tags[:, i, :], (-1,)).long())
                       for i, l in enumerate(num_labels)]
             loss += sum(losses)
-            preds += torch.argmax(logits, dim=3)
-            segments += tokens
+            tag_ids = torch.argmax(logits, dim=3)
+            preds += tag_ids.cpu()
             valid_lens += list(valid_len)
 
-        loss /= len(dataloader)
+            # Update segments, attach predicted tags to each token
+            segments += self.to_segments(tokens, tag_ids, first_subword, dataloader.dataset.vocab)
 
-        # Update segments, attach predicted tags to each token
-        segments = self.to_segments(segments, preds, valid_lens, dataloader.dataset.vocab)
+        loss /= len(dataloader)
 
         return preds, segments, valid_lens, loss
 
     def infer(self, dataloader):
-        golds, preds, segments, valid_lens = list(), list(), list(), list()
+        segments = list()
 
-        for _, gold_tags, tokens, valid_len, logits in self.tag(
+        for _, gold_tags, tokens, valid_len, logits, first_subword in self.tag(
             dataloader, is_train=False
         ):
-            preds += torch.argmax(logits, dim=3)
-            segments += tokens
-            valid_lens += list(valid_len)
+            probs, tag_ids = torch.max(torch.softmax(logits, dim=3), dim=3)
+            segments += self.to_segments(tokens, tag_ids, first_subword, dataloader.dataset.vocab, scores=probs)
 
-        segments = self.to_segments(segments, preds, valid_lens, dataloader.dataset.vocab)
         return segments
 
-    def to_segments(self, segments, preds, valid_lens, vocab):
+    def to_segments(self, segments, preds, first_subword, vocab, scores=None):
+        """
+        Attach the predicted tags of one batch to the tokens
+        :param segments: list[list[Token]] - the tokens of each segment of the batch
+        :param preds: torch.Tensor (B x T x NUM_TAG_TYPES) - predicted tag IDs
+        :param first_subword: torch.Tensor (B x T) - True for the subwords whose token is tagged,
+                              the first subword of each token, [CLS], [SEP] and padding excluded
+        :param vocab: vocab object containing indexed tags and tokens
+        :param scores: torch.Tensor (B x T x NUM_TAG_TYPES) - probability of each predicted tag
+        :return: list[list[Token]] - the tagged tokens of each segment
+        """
         if vocab is None:
             vocab = self.vocab
 
-        tagged_segments = list()
-        tokens_stoi = vocab.tokens.get_stoi()
-        unk_id = tokens_stoi["UNK"]
-
-        for segment, pred, valid_len in zip(segments, preds, valid_lens):
-            # First, the token at 0th index [CLS] and token at nth index [SEP]
-            # Combine the tokens with their corresponding predictions
-            segment_pred = zip(segment[1:valid_len-1], pred[1:valid_len-1])
-
-            # Ignore the sub-tokens/subwords, which are identified with text being UNK
-            segment_pred = list(filter(lambda t: tokens_stoi[t[0].text] != unk_id, segment_pred))
-
-            # Attach the predicted tags to each token
-            list(map(lambda t: setattr(t[0], 'pred_tag', [{"tag": vocab.get_itos()[tag_id]}
-                                                     for tag_id, vocab in zip(t[1].int().tolist(), vocab.tags[1:])]), segment_pred))
-
-            # We are only interested in the tagged tokens, we do no longer need raw model predictions
-            tagged_segment = [t for t, _ in segment_pred]
-            tagged_segments.append(tagged_segment)
+        # The tag names of each tag type, indexed by tag ID
+        tag_names = [np.array(tag_vocab.get_itos(), dtype=object) for tag_vocab in vocab.tags[1:]]
+
+        # Gather the predictions of the first subwords of all the segments at once
+        # (NUM_FIRST_SUBWORDS x NUM_TAG_TYPES), in the order of the segments and tokens
+        first_subword = first_subword.to(preds.device)
+        positions = first_subword.nonzero().tolist()
+        tag_ids = preds[first_subword].int().cpu().numpy()
+        labels = np.stack([names[tag_ids[:, i]] for i, names in enumerate(tag_names)], axis=-1).tolist()
+        token_scores = scores[first_subword].cpu().tolist() if scores is not None else None
+
+        # Attach the predicted tags to each token, with their probability if available.
+        # The probabilities are used to merge the predictions of overlapping windows.
+        # We are only interested in the tagged tokens, we do no longer need raw model predictions
+        tagged_segments = [list() for _ in segments]
+        for j, (n, i) in enumerate(positions):
+            token = segments[n][i]
+            if token_scores is None:
+                token.pred_tag = [{"tag": tag} for tag in labels[j]]
+            else:
+                token.pred_tag = [{"tag": tag, "score": score} for tag, score in zip(labels[j], token_scores[j])]
+            tagged_segments[n].append(token)
 
         return tagged_segments
@@ -141,17 +141,15 @@ class BertTrainer(BaseTrainer):
             vocab = self.vocab
 
         tagged_segments = list()
-        tokens_stoi = vocab.tokens.get_stoi()
         tags_itos = vocab.tags[0].get_itos()
-        unk_id = tokens_stoi["UNK"]
 
         for segment, pred, valid_len in zip(segments, preds, valid_lens):
             # First, the token at 0th index [CLS] and token at nth index [SEP]
             # Combine the tokens with their corresponding predictions
             segment_pred = zip(segment[1:valid_len-1], pred[1:valid_len-1])
 
-            # Ignore the sub-tokens/subwords, which are identified with text being UNK
-            segment_pred = list(filter(lambda t: tokens_stoi[t[0].text] != unk_id, segment_pred))
+            # Ignore the sub-tokens/subwords, which are not flagged as first subwords
+            segment_pred = list(filter(lambda t: t[0].first_subword, segment_pred))
 
             # Attach the predicted tags to each token
             list(map(lambda t: setattr(t[0], 'pred_tag', [{"tag": tags_itos[t[1]]}]), segment_pred))
@@ -1,27 +1,54 @@
 import torch
-from transformers import BertTokenizer
+from transformers import BertTokenizer, BertTokenizerFast
 from functools import partial
-import re
-import itertools
 from sinatools.ner import datasets
-
-class BertSeqTransform:
-    def __init__(self, bert_model, vocab, max_seq_len=512):
-        self.tokenizer = BertTokenizer.from_pretrained(bert_model)
+from sinatools.ner.helpers import tag_type_lookup, tags_by_type
+
+
+class BertTransform:
+    def __init__(self, bert_model, vocab, max_seq_len=512, fast_tokenizer=False):
+        """
+        Base class of the transforms, loads the BERT tokenizer and splits the tokens into subwords
+        :param bert_model: str - BERT model
+        :param vocab: vocab object containing indexed tags and tokens
+        :param max_seq_len: int - maximum sequence length
+        :param fast_tokenizer: boolean - encode each segment in one call with the Rust tokenizer
+                               instead of encoding its tokens one by one with the Python tokenizer
+        """
+        tokenizer_class = BertTokenizerFast if fast_tokenizer else BertTokenizer
+        self.tokenizer = tokenizer_class.from_pretrained(bert_model)
         self.encoder = partial(
             self.tokenizer.encode,
             max_length=max_seq_len,
             truncation=True,
         )
+        self.fast_tokenizer = fast_tokenizer
         self.max_seq_len = max_seq_len
         self.vocab = vocab
 
+    def encode_tokens(self, segment):
+        """
+        Split each token of the segment into subwords
+        :param segment: list[Token]
+        :return: list[list[int]] - the subword IDs of each token, without [CLS] and [SEP]
+        """
+        if not self.fast_tokenizer:
+            return [self.encoder(token.text)[1:-1] for token in segment]
+
+        token_subwords = [list() for _ in segment]
+        if segment:
+            encoding = self.tokenizer([token.text for token in segment], is_split_into_words=True, add_special_tokens=False)
+            for subword, word_id in zip(encoding["input_ids"], encoding.word_ids()):
+                token_subwords[word_id].append(subword)
+        return token_subwords
+
+
+class BertSeqTransform(BertTransform):
     def __call__(self, segment):
         subwords, tags, tokens = list(), list(), list()
-        unk_token = datasets.Token(text="UNK")
+        unk_token = datasets.Token(text="UNK", first_subword=False)
 
-        for token in segment:
-            token_subwords = self.encoder(token.text)[1:-1]
+        for token, token_subwords in zip(segment, self.encode_tokens(segment)):
             subwords += token_subwords
             tags += [self.vocab.tags[0].get_stoi()[token.gold_tag[0]]] + [self.vocab.tags[0].get_stoi()["O"]] * (len(token_subwords) - 1)
             tokens += [token] + [unk_token] * (len(token_subwords) - 1)
@@ -46,24 +73,21 @@ class BertSeqTransform:
         return torch.LongTensor(subwords), torch.LongTensor(tags), tokens, len(tokens)
 
 
-class NestedTagsTransform:
-    def __init__(self, bert_model, vocab, max_seq_len=512):
-        self.tokenizer = BertTokenizer.from_pretrained(bert_model)
-        self.encoder = partial(
-            self.tokenizer.encode,
-            max_length=max_seq_len,
-            truncation=True,
-        )
-        self.max_seq_len = max_seq_len
-        self.vocab = vocab
+class NestedTagsTransform(BertTransform):
+    def __init__(self, bert_model, vocab, max_seq_len=512, fast_tokenizer=False):
+        super().__init__(bert_model, vocab, max_seq_len=max_seq_len, fast_tokenizer=fast_tokenizer)
+
+        # Computed once per vocab: the tag type and ID of each entity tag, and the ID of O for each tag type
+        self.tag_lookup = tag_type_lookup(vocab.tags[1:])
+        self.o_tag_ids = [tag_vocab.get_stoi()["O"] for tag_vocab in vocab.tags[1:]]
 
     def __call__(self, segment):
         tags, tokens, subwords = list(), list(), list()
-        unk_token = datasets.Token(text="UNK")
+        unk_token = datasets.Token(text="UNK", first_subword=False)
 
         # Encode each token and get its subwords and IDs
-        for token in segment:
-            token.subwords = self.encoder(token.text)[1:-1]
+        for token, token_subwords in zip(segment, self.encode_tokens(segment)):
+            token.subwords = token_subwords
             subwords += token.subwords
             tokens += [token] + [unk_token] * (len(token.subwords ) - 1)
 
@@ -76,19 +100,16 @@ class NestedTagsTransform:
         #       [B-ORG, I-ORG, O,      O,      O, O, O]
         #       [O,     O,     O,      O,      O, O, B-GPE]
         #   ]
-        for vocab in self.vocab.tags[1:]:
-            vocab_tags = "|".join([t for t in vocab.get_itos() if "-" in t])
-            r = re.compile(vocab_tags)
-
-            # This is really messy
-            # For a given token we find a matching tag_name, BUT we might find
-            # multiple matches (i.e. a token can be labeled B-ORG and I-ORG) in this
-            # case we get only the first tag as we do not have overlapping of same type
-            single_type_tags = [[(list(filter(r.match, token.gold_tag))
-                                or ["O"])[0]] + ["O"] * (len(token.subwords) - 1)
-                                for token in segment]
-            single_type_tags = list(itertools.chain(*single_type_tags))
-            tags.append([vocab.get_stoi()[tag] for tag in single_type_tags])
+        # For a given token we find the tag of each type with a lookup, BUT we might find
+        # multiple tags of the same type (i.e. a token can be labeled B-ORG and I-ORG), in
+        # this case we get only the first tag as we do not have overlapping of same type
+        tags = [list() for _ in self.o_tag_ids]
+        for token in segment:
+            token_tags = tags_by_type(token.gold_tag, self.tag_lookup, len(self.o_tag_ids))
+
+            for type_tags, tag_id, o_tag_id in zip(tags, token_tags, self.o_tag_ids):
+                tag_id = o_tag_id if tag_id is None else tag_id
+                type_tags += [tag_id] + [o_tag_id] * (len(token.subwords) - 1)
 
         # Truncate to max_seq_len
         if len(subwords) > self.max_seq_len - 2:
@@ -110,10 +131,13 @@ class NestedTagsTransform:
         # Add "O" tags for the first and last subwords
         tags = torch.Tensor(tags)
         tags = torch.column_stack((
-            torch.Tensor([vocab.get_stoi()["O"] for vocab in self.vocab.tags[1:]]),
+            torch.Tensor(self.o_tag_ids),
             tags,
-            torch.Tensor([vocab.get_stoi()["O"] for vocab in self.vocab.tags[1:]]),
+            torch.Tensor(self.o_tag_ids),
         )).unsqueeze(0)
 
+        # Flag the tokens to tag, the first subword of each token
+        first_subword = torch.BoolTensor([token.first_subword for token in tokens])
+
         mask = torch.ones_like(tags)
-        return subwords, tags, tokens, mask, len(tokens)
\ No newline at end of file
+        return subwords, tags, tokens, mask, len(tokens), first_subword
\ No newline at end of file
@@ -0,0 +1,89 @@
+import os
+
+
+class ColumnarCorpusWriter:
+    """
+    Writes a tokenized corpus as two Parquet files in a directory: `sentences.parquet`, where each sentence is stored once, and `words.parquet`, where each word refers to its sentence through the `Global Sentence ID` column. Compared to one CSV row per word that repeats the whole sentence, the output is several times smaller and much faster to read back. Rows are buffered and written in row groups of `row_group_size` rows.
+
+    This writer requires the `pyarrow` package.
+
+    Args:
+        output_dir (:obj:`str`): The directory where the Parquet files are written. It is created if it does not exist.
+        sentence_columns (:obj:`list`): The names of the columns of the sentences table.
+        word_columns (:obj:`list`): The names of the columns of the words table.
+        row_group_size (:obj:`int`): The number of rows buffered before a row group is written (default is 100000).
+
+    **Example:**
+
+    .. highlight:: python
+    .. code-block:: python
+
+        import pandas as pd
+        sentences = pd.read_parquet('output/sentences.parquet')
+        words = pd.read_parquet('output/words.parquet')
+        words.merge(sentences, on='Global Sentence ID')
+    """
+
+    def __init__(self, output_dir, sentence_columns, word_columns, row_group_size=100000):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("The parquet output requires pyarrow. Install it with: pip install pyarrow")
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        os.makedirs(output_dir, exist_ok=True)
+        self.row_group_size = row_group_size
+        self._tables = {
+            'sentences': _Table(os.path.join(output_dir, 'sentences.parquet'), sentence_columns),
+            'words': _Table(os.path.join(output_dir, 'words.parquet'), word_columns),
+        }
+
+    def write_sentence(self, row):
+        self._write('sentences', row)
+
+    def write_word(self, row):
+        self._write('words', row)
+
+    def _write(self, name, row):
+        table = self._tables[name]
+        for column, values in table.columns.items():
+            values.append(row[column])
+        if len(table) >= self.row_group_size:
+            self._flush(table)
+
+    def _flush(self, table):
+        if table.writer is None:
+            batch = self._pa.Table.from_pydict(table.columns)
+            table.writer = self._pq.ParquetWriter(table.path, batch.schema)
+        else:
+            batch = self._pa.Table.from_pydict(table.columns, schema=table.writer.schema)
+        table.writer.write_table(batch)
+        table.clear()
+
+    def close(self):
+        for table in self._tables.values():
+            if len(table) or table.writer is None:
+                self._flush(table)
+            table.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _Table:
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = {column: [] for column in columns}
+        self.writer = None
+
+    def __len__(self):
+        return len(next(iter(self.columns.values())))
+
+    def clear(self):
+        for values in self.columns.values():
+            values.clear()
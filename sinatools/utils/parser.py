@@ -1,5 +1,6 @@
 import re 
 import argparse
+import functools
 
 def arStrip(text , diacs=True , small_diacs=True , shaddah=True , digit=True, alif=True , special_chars=True ):
     
@@ -37,34 +38,75 @@ def arStrip(text , diacs=True , small_diacs=True , shaddah=True , digit=True, al
     """
     try:
         if text: # if the input string is not empty do the following
-            #print("in if")
-            if diacs == True :
-                text = re.sub(r'[\u064B-\u0650]+', '',text) # Remove all Arabic diacretics [ ًٌٍَُِْ]
-                text = re.sub(r'[\u0652]+', '',text) # Remove SUKUN
-            if shaddah == True:
-                text = re.sub(r'[\u0651]+', '',text) # Remove shddah
-            if small_diacs == True:
-                text = re.sub(r'[\u06D6-\u06ED]+', '',text) # Remove all small Quranic annotation signs
-            if digit == True:
-                text = re.sub('[0-9]+', ' ',text) # Remove English digits
-                text = re.sub('[٠-٩]+', ' ',text)# Remove Arabic digits
-            
-            if alif == True:                             # Unify alif with hamzah: 
-                text = re.sub('ٱ', 'ا',text);
-                text = re.sub('أ', 'ا',text);
-                text = re.sub('إ', 'ا',text);
-                text = re.sub('آ', 'ا',text);
-            if special_chars == True:
-                text = re.sub('[?؟!@#$%-]+' , '' , text) # Remove some of special chars 
-
-            text = re.sub('[\\s]+'," ",text) # Remove all spaces
-            text = text.replace("_" , '') #Remove underscore
-            text = text.replace("ـ" , '') # Remove Arabic tatwelah
-            text = text.strip() # Trim input string
+            text = get_normalizer(diacs, small_diacs, shaddah, digit, alif, special_chars)(text)
     except:
         return text
     return text
-    
+
+
+_ALIF_VARIANTS = 'ٱأإآ'
+_SPECIAL_CHARS = '?؟!@#$%-'
+_LATIN_DIGITS = '0123456789'
+_ARABIC_DIGITS = '٠١٢٣٤٥٦٧٨٩'
+# Removed after extra spaces are collapsed, like in the original chain of substitutions
+_UNDERSCORE_TATWEELAH_TABLE = str.maketrans('', '', '_ـ')
+
+
+def get_normalizer(diacs=True , small_diacs=True , shaddah=True , digit=True, alif=True , special_chars=True):
+    """
+    Returns a precompiled function that normalizes a string exactly like :func:`arStrip` with the same flags. The returned function is built once per combination of flags: it replaces or removes the selected characters with a single translation table, then collapses spaces, which makes it several times faster than running the substitutions one by one. Use it in loops that normalize many strings with the same flags.
+
+    Args:
+        diacs (:obj:`bool`): flag to remove Arabic diacretics (default is True).
+        small_diacs (:obj:`bool`): flag to remove Quranic annotation signs and small alif (default is True).
+        shaddah (:obj:`bool`): flag to remove shaddah (default is True).
+        digit (:obj:`bool`): flag to remove Latin and Arabic digits (default is True).
+        alif (:obj:`bool`): flag to unify alif (default is True).
+        special_chars (:obj:`bool`): flag to remove special characters (default is True).
+
+    Returns:
+        :obj:`function`: a function that takes a non-empty string and returns the stripped string.
+
+    **Example:**
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from sinatools.utils import parser
+        normalize = parser.get_normalizer(alif=False, digit=False)
+        print(normalize('أبريل?! 2024'))
+
+        # output
+        أبريل 2024
+    """
+    return _build_normalizer(diacs == True, small_diacs == True, shaddah == True, digit == True, alif == True, special_chars == True)
+
+
+@functools.lru_cache(maxsize=None)
+def _build_normalizer(diacs, small_diacs, shaddah, digit, alif, special_chars):
+    table = {}
+    if diacs:
+        table.update(dict.fromkeys(range(0x064B, 0x0651))) # Arabic diacretics [ ًٌٍَُِ]
+        table[0x0652] = None # SUKUN
+    if shaddah:
+        table[0x0651] = None
+    if small_diacs:
+        table.update(dict.fromkeys(range(0x06D6, 0x06EE))) # small Quranic annotation signs
+    if digit:
+        # runs of digits become one space once spaces are collapsed
+        table.update(dict.fromkeys(map(ord, _LATIN_DIGITS + _ARABIC_DIGITS), ' '))
+    if alif:
+        table.update(dict.fromkeys(map(ord, _ALIF_VARIANTS), 'ا'))
+    if special_chars:
+        table.update(dict.fromkeys(map(ord, _SPECIAL_CHARS)))
+
+    def normalize(text):
+        # str.split() and the \s class of re use the same definition of whitespace
+        text = ' '.join(text.translate(table).split())
+        return text.translate(_UNDERSCORE_TATWEELAH_TABLE).strip()
+
+    return normalize
+
 def remove_punctuation(text):
     """
     Removes these arabic and english punctuation marks from the text [! " # $ % & ' ( ) * + , - . / : ; > = < ? @ [ \ ] ^ _ ` { | } ~ ، ؛ ؞ ؟ ـ ٓ ٬ ٪ ٫ ٭ ۔].
@@ -95,17 +137,24 @@ def remove_punctuation(text):
     """
     try:
         if text:
-            punctuation_marks = [r'[\u0021-\u002F]+', r'[U+060C]+', r'[\u003A-\u0040]+',
-                                 r'[\u005B-\u0060]+', r'[\u007B-\u007E]+', r'[\u060C]+',
-                                 r'[\u061B]+', r'[\u061E]+', r'[\u061F]+', r'[\u0640]+',
-                                 r'[\u0653]+', r'[\u065C]+', r'[\u066C]+', r'[\u066A]+',
-                                 r'["}"]+', r'["{"]+']
-            output_string = text
-            for punctuation in punctuation_marks:
-                output_string = re.sub(punctuation, '', output_string)
+            return text.translate(_PUNCTUATION_TABLE)
     except:
         return text
-    return output_string
+    return text
+
+
+# The characters removed by remove_punctuation. The original list of patterns also
+# contained [U+060C], a character class that removes "U", "+", "0", "6" and "C";
+# these are kept so that the output does not change.
+_PUNCTUATION_CHARS = (
+    ''.join(map(chr, range(0x21, 0x30)))    # ! " # $ % & ' ( ) * + , - . /
+    + ''.join(map(chr, range(0x3A, 0x41)))  # : ; < = > ? @
+    + ''.join(map(chr, range(0x5B, 0x61)))  # [ \ ] ^ _ `
+    + ''.join(map(chr, range(0x7B, 0x7F)))  # { | } ~
+    + 'U+060C'
+    + '\u060C\u061B\u061E\u061F\u0640\u0653\u065C\u066C\u066A'
+)
+_PUNCTUATION_TABLE = str.maketrans('', '', _PUNCTUATION_CHARS)
 
 def remove_latin(text):
     """
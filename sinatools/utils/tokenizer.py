@@ -1,5 +1,7 @@
 import os
 import csv
+import json
+import multiprocessing
 from sinatools.utils.tokenizers_words import simple_word_tokenize
 
 def remove_empty_values(sentences):
@@ -32,8 +34,54 @@ def sentence_tokenizer(text, dot=True, new_line=True, question_mark=True, exclam
         #output
         ['مختبر سينا لحوسبة اللغة والذكاء الإصطناعي.', 'في جامعة بيرزيت.']
     """
+    return list(iter_sentences(text, dot, new_line, question_mark, exclamation_mark))
+
+
+def iter_sentences(text, dot=True, new_line=True, question_mark=True, exclamation_mark=True):
+    """
+    This method is the lazy version of :func:`sentence_tokenizer`. It yields the same sentences, one at a time, and accepts either a string or an iterable of strings such as an open file, so large documents can be split into sentences without loading them into memory.
+
+    The text is read once. Only the text since the last occurrence of the first selected separator (the new line by default) is kept in memory.
+
+    Args:
+        text (:obj:`str` or :obj:`iterable`): Arabic text to be tokenized, or an iterable of text chunks (e.g. a file object).
+        dot (:obj:`str`): flag to split text based on Dot (default is True).
+        new_line (:obj:`str`): flag to split text based on new_line (default is True).
+        question_mark (:obj:`str`): flag to split text based on question_mark (default is True).
+        exclamation_mark (:obj:`str`): flag to split text based on exclamation_mark (default is True).
+
+    Returns:
+        :obj:`generator`: generator of sentences.
+
+    **Example:**
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from sinatools.utils import tokenizer
+        with open('corpus.txt', encoding='utf-8') as f:
+            for sentence in tokenizer.iter_sentences(f):
+                print(sentence)
+    """
+    separators = _get_separators(dot, new_line, question_mark, exclamation_mark)
+    chunks = (text,) if isinstance(text, str) else text
+
+    if not separators:
+        text = ''.join(chunks)
+        if text != '':
+            yield text
+        return
+
+    # Each separator splits the parts produced by the previous ones independently,
+    # so the parts of the first separator can be read from the stream one by one.
+    for part in _split_chunks(chunks, separators[0]):
+        for sentence in _split_part(part, separators[1:]):
+            if sentence != '':
+                yield sentence
+
+
+def _get_separators(dot, new_line, question_mark, exclamation_mark):
     separators = []
-    split_text = [text]
     if new_line==True:
         separators.append('\n')
     if dot==True:
@@ -43,7 +91,27 @@ def sentence_tokenizer(text, dot=True, new_line=True, question_mark=True, exclam
         separators.append('؟')
     if exclamation_mark==True:
         separators.append('!')
-    
+    return separators
+
+
+def _split_chunks(chunks, sep):
+    # Same as splitting the concatenated chunks with _split_part(text, [sep])
+    pending = []
+    for chunk in chunks:
+        tokens = chunk.split(sep)
+        if len(tokens) == 1:
+            pending.append(chunk)
+            continue
+        pending.append(tokens[0])
+        yield ''.join(pending) + sep
+        for token in tokens[1:-1]:
+            yield token + sep
+        pending = [tokens[-1]]
+    yield ''.join(pending).strip()
+
+
+def _split_part(text, separators):
+    split_text = [text]
     for sep in separators:
         new_split_text = []
         for part in split_text:
@@ -52,11 +120,9 @@ def sentence_tokenizer(text, dot=True, new_line=True, question_mark=True, exclam
             tokens_with_separator.append(tokens[-1].strip())
             new_split_text.extend(tokens_with_separator)
         split_text = new_split_text
-    
-    split_text = remove_empty_values(split_text)    
     return split_text
 
-def corpus_tokenizer(dir_path, output_csv, row_id = 1, global_sentence_id = 1):
+def corpus_tokenizer(dir_path, output_csv, row_id = 1, global_sentence_id = 1, workers = 1, manifest = None, output_format = 'csv'):
     """
     This method is designed to tokenize a corpus into words. It receives a directory and tokenizes all files within the input directory, as well as all files within subdirectories within the main directory. The results are then stored in one CSV file. The data within files was split into sentences using the sentence_tokenizer module and into words using a word tokenizer. Additionally, it added a set of ids (row_id, docs_sentence_word_id, global_sentence_id, sentence_id, word_position).
 
@@ -65,6 +131,9 @@ def corpus_tokenizer(dir_path, output_csv, row_id = 1, global_sentence_id = 1):
         output_csv (:obj:`str`): The name of the output CSV file, which will be generated in the current directory where this function is used.
         row_id (:obj:`int`): Specifies the row_id you wish to start with; the default value is 1.
         global_sentence_id (:obj:`int`): Specifies the global_sentence_id you wish to start with; the default value is 1.
+        workers (:obj:`int`): The number of processes that tokenize files in parallel; the default value is 1. The output does not depend on the number of workers: files are written in the same order and get the same ids.
+        manifest (:obj:`str`): The path of a checkpoint manifest (optional). When given, the ids reached after each completed file are recorded in it. If the manifest already exists, the run resumes after the last completed file instead of starting over, and row_id and global_sentence_id are taken from the manifest. Only supported with the csv output format.
+        output_format (:obj:`str`): The output format, `csv` (default) or `parquet`. With `parquet`, output_csv is a directory where two files are written (this requires pyarrow): sentences.parquet with the columns Global Sentence ID, Sentence ID, Document and Sentence, and words.parquet with the columns Row_ID, Docs_Sentence_Word_ID, Global Sentence ID, Word Position and Word. Each sentence is stored once instead of being repeated on every word.
 
     Returns:
         csv file (:obj:`str`): The CSV file contains the following fields: 
@@ -94,33 +163,146 @@ def corpus_tokenizer(dir_path, output_csv, row_id = 1, global_sentence_id = 1):
         # 3,History_h1_1_1_3,1,1,الطيور الضارة ومكافحتها,3,ومكافحتها
         # 4,History_h2_2_1_1,1,1,بشكل عام,1,بشكل
         # 5,History_h2_2_1_2,1,1,بشكل عام,2,عام
+
+        # tokenize with 8 processes, and resume the run if it is interrupted
+        tokenizer.corpus_tokenizer(dir_path="History", output_csv="ouputFile.csv", workers=8, manifest="ouputFile.manifest")
+
+        # columnar output in the directory ouputDir
+        tokenizer.corpus_tokenizer(dir_path="History", output_csv="ouputDir", output_format="parquet")
     """    
+    if output_format == 'parquet':
+        if manifest is not None:
+            raise ValueError("A manifest can only be used with the csv output format")
+        _corpus_to_parquet(dir_path, output_csv, row_id, global_sentence_id, workers)
+        return
+    elif output_format != 'csv':
+        raise ValueError(f"Unknown output format: {output_format}")
+
+    fieldnames = ['Row_ID', 'Docs_Sentence_Word_ID', 'Global Sentence ID', 'Sentence ID', 'Sentence', 'Word Position', 'Word']
     row_id = row_id - 1
     global_sentence_id = global_sentence_id - 1
-    with open(output_csv, 'w', newline='', encoding="utf-8") as csvfile:
-        fieldnames = ['Row_ID', 'Docs_Sentence_Word_ID', 'Global Sentence ID', 'Sentence ID', 'Sentence', 'Word Position', 'Word']
+    done_files = set()
+
+    if manifest is not None and os.path.exists(manifest):
+        checkpoints = _read_manifest(manifest)
+        done_files = {checkpoint['file'] for checkpoint in checkpoints if checkpoint['file'] is not None}
+        checkpoint = checkpoints[-1]
+        row_id, global_sentence_id = checkpoint['row_id'], checkpoint['global_sentence_id']
+        # drop the rows written after the last checkpoint
+        with open(output_csv, 'r+b') as csvfile:
+            csvfile.truncate(checkpoint['offset'])
+        csvfile = open(output_csv, 'a', newline='', encoding="utf-8")
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+    else:
+        csvfile = open(output_csv, 'w', newline='', encoding="utf-8")
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
         writer.writeheader()
-        
-        for root, dirs, files in os.walk(dir_path):
-            for file in files:
-                if file.endswith('.txt'):
-                    file_path = os.path.join(root, file)
-                    with open(file_path, 'r', encoding="utf-8") as f:
-                        content = f.read()
-                        sentences = sentence_tokenizer(content, dot=True, new_line=True, question_mark=False, exclamation_mark=False)
-                        for sentence_id, sentence in enumerate(sentences, start=1):
-                            words = simple_word_tokenize(sentence)
-                            global_sentence_id += 1
-                            for word_pos, word in enumerate(words, start=1):
-                                row_id += 1
-                                dir_name = os.path.basename(root)
-                                doc_sentence_filename = file.split(".txt")[0]
-                                docs_sentence_word_id = f"{dir_name}_{doc_sentence_filename}_{global_sentence_id}_{sentence_id}_{word_pos}"
-                                writer.writerow({'Row_ID': row_id,
-                                                 'Docs_Sentence_Word_ID': docs_sentence_word_id,
-                                                 'Global Sentence ID': global_sentence_id,
-                                                 'Sentence ID': sentence_id,
-                                                 'Sentence': sentence,
-                                                 'Word Position': word_pos,
-                                                 'Word': word})
+        if manifest is not None:
+            with open(manifest, 'w', encoding="utf-8") as f:
+                _write_checkpoint(f, None, row_id, global_sentence_id, csvfile)
+
+    files = [(root, file) for root, file in _corpus_files(dir_path)
+             if os.path.relpath(os.path.join(root, file), dir_path) not in done_files]
+
+    manifest_file = open(manifest, 'a', encoding="utf-8") if manifest is not None else None
+    try:
+        with csvfile:
+            for root, file, sentences in _tokenize_files(files, workers):
+                dir_name = os.path.basename(root)
+                doc_sentence_filename = file.split(".txt")[0]
+                for sentence_id, (sentence, words) in enumerate(sentences, start=1):
+                    global_sentence_id += 1
+                    for word_pos, word in enumerate(words, start=1):
+                        row_id += 1
+                        docs_sentence_word_id = f"{dir_name}_{doc_sentence_filename}_{global_sentence_id}_{sentence_id}_{word_pos}"
+                        writer.writerow({'Row_ID': row_id,
+                                         'Docs_Sentence_Word_ID': docs_sentence_word_id,
+                                         'Global Sentence ID': global_sentence_id,
+                                         'Sentence ID': sentence_id,
+                                         'Sentence': sentence,
+                                         'Word Position': word_pos,
+                                         'Word': word})
+                if manifest_file is not None:
+                    _write_checkpoint(manifest_file, os.path.relpath(os.path.join(root, file), dir_path), row_id, global_sentence_id, csvfile)
+    finally:
+        if manifest_file is not None:
+            manifest_file.close()
+
+
+def _corpus_to_parquet(dir_path, output_dir, row_id, global_sentence_id, workers):
+    from sinatools.utils.columnar import ColumnarCorpusWriter
+
+    row_id = row_id - 1
+    global_sentence_id = global_sentence_id - 1
+    sentence_columns = ['Global Sentence ID', 'Sentence ID', 'Document', 'Sentence']
+    word_columns = ['Row_ID', 'Docs_Sentence_Word_ID', 'Global Sentence ID', 'Word Position', 'Word']
+
+    with ColumnarCorpusWriter(output_dir, sentence_columns, word_columns) as writer:
+        for root, file, sentences in _tokenize_files(list(_corpus_files(dir_path)), workers):
+            document = f"{os.path.basename(root)}_{file.split('.txt')[0]}"
+            for sentence_id, (sentence, words) in enumerate(sentences, start=1):
+                global_sentence_id += 1
+                writer.write_sentence({'Global Sentence ID': global_sentence_id,
+                                       'Sentence ID': sentence_id,
+                                       'Document': document,
+                                       'Sentence': sentence})
+                for word_pos, word in enumerate(words, start=1):
+                    row_id += 1
+                    writer.write_word({'Row_ID': row_id,
+                                       'Docs_Sentence_Word_ID': f"{document}_{global_sentence_id}_{sentence_id}_{word_pos}",
+                                       'Global Sentence ID': global_sentence_id,
+                                       'Word Position': word_pos,
+                                       'Word': word})
+
+
+def _tokenize_files(files, workers):
+    paths = [os.path.join(root, file) for root, file in files]
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    try:
+        # imap returns the results in the order of the files, whatever the order they finish in
+        results = pool.imap(_tokenize_file, paths) if pool else map(_tokenize_file, paths)
+        for (root, file), sentences in zip(files, results):
+            yield root, file, sentences
+    finally:
+        if pool:
+            pool.terminate()
+
+
+def _corpus_files(dir_path):
+    for root, dirs, files in os.walk(dir_path):
+        for file in files:
+            if file.endswith('.txt'):
+                yield root, file
+
+
+def _tokenize_file(file_path):
+    with open(file_path, 'r', encoding="utf-8") as f:
+        return [(sentence, simple_word_tokenize(sentence))
+                for sentence in iter_sentences(f, dot=True, new_line=True, question_mark=False, exclamation_mark=False)]
+
+
+def _write_checkpoint(manifest_file, file, row_id, global_sentence_id, csvfile):
+    # the rows of the file are on disk before the checkpoint that marks it as done
+    csvfile.flush()
+    os.fsync(csvfile.fileno())
+    checkpoint = {'file': file, 'row_id': row_id, 'global_sentence_id': global_sentence_id, 'offset': csvfile.tell()}
+    manifest_file.write(json.dumps(checkpoint, ensure_ascii=False) + '\n')
+    manifest_file.flush()
+
+
+def _read_manifest(manifest):
+    checkpoints = []
+    with open(manifest, 'r', encoding="utf-8") as f:
+        for line in f:
+            try:
+                checkpoints.append(json.loads(line))
+            except ValueError:
+                # a checkpoint interrupted while being written
+                break
+    if not checkpoints:
+        raise ValueError(f"The manifest {manifest} does not contain any checkpoint")
+    # rewrite the valid checkpoints so that new ones are not appended to a truncated line
+    with open(manifest, 'w', encoding="utf-8") as f:
+        for checkpoint in checkpoints:
+            f.write(json.dumps(checkpoint, ensure_ascii=False) + '\n')
+    return checkpoints
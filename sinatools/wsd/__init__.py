@@ -1,11 +1,20 @@
-from sinatools.wsd import settings 
 import pickle
 from sinatools.DataDownload import downloader
 import os 
 
-glosses_dic = {}
+# The glosses dictionary is loaded the first time it is requested, so that the modules
+# of the package that do not need it (e.g. gloss_encodings) can be imported without
+# the WSD data and model. The model is loaded by sinatools.wsd.settings.
 filename = 'one_gram.pickle'
-path =downloader.get_appdatadir()
-file_path = os.path.join(path, filename)
-with open(file_path, 'rb') as f:
-    glosses_dic = pickle.load(f)
+_glosses_dic = None
+
+
+def __getattr__(name):
+    global _glosses_dic
+    if name == 'glosses_dic':
+        if _glosses_dic is None:
+            file_path = os.path.join(downloader.get_appdatadir(), filename)
+            with open(file_path, 'rb') as f:
+                _glosses_dic = pickle.load(f)
+        return _glosses_dic
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
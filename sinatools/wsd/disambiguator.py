@@ -1,7 +1,7 @@
 import json
 from sinatools.wsd import settings 
 from sinatools.wsd.wsd import normalizearabert
-from sinatools.wsd.wsd import GlossPredictor
+from sinatools.wsd.wsd import GlossPredictor, predict_glosses
 from sinatools.utils.parser import arStrip
 from sinatools.utils.tokenizers_words import simple_word_tokenize
 from sinatools.morphology.ALMA_multi_word import ALMA_multi_word
@@ -400,6 +400,40 @@ def find_glosses(input_sentence, two_word_lemma, three_word_lemma,four_word_lemm
             position = position + 1  
       return output_list                    
 
+def disambiguate_sentences(sentences_words, batch_size=32):
+   """
+   Disambiguate the words found by find_glosses for several sentences. The words that need the
+   ArabGlossBERT model are collected from all the sentences, their candidate glosses are scored
+   together in batches, then the best gloss is chosen for each word.
+   :param sentences_words: list of (output_list, sentence) - the output of find_glosses and the sentence
+   :param batch_size: int - number of (sentence, gloss) pairs per forward pass of the model
+   :return: list - the results of disambiguate_glosses_main for each word of each sentence
+   """
+   results = []
+   salma_words, salma_inputs = [], []
+   for output_list, sentence in sentences_words:
+      sentence_results = []
+      for word in output_list:
+         if word['concept_count'] in (0, 1, '*') or word['glosses'] == None:
+            sentence_results.append(disambiguate_glosses_main(word, sentence))
+         else:
+            normalized_word = normalizearabert(word['word'])
+            glosses_dictionary = {}
+            for gloss in word['glosses']:
+               glosses_dictionary.update({gloss['concept_id'] : gloss['gloss']})
+            salma_words.append((sentence_results, len(sentence_results), normalized_word, word['Diac_lemma']))
+            salma_inputs.append((word['Diac_lemma'], word['Undiac_lemma'], normalized_word, sentence, glosses_dictionary))
+            sentence_results.append(None)
+      results.append(sentence_results)
+
+   for (sentence_results, index, normalized_word, Diac_lemma), (concept_id, gloss) in zip(salma_words, predict_glosses(salma_inputs, batch_size)):
+      my_json = {}    
+      my_json['concept_id'] = concept_id
+      my_json['word'] = normalized_word
+      my_json['lemma'] = Diac_lemma
+      sentence_results[index] = my_json
+   return results
+
 def disambiguate_glosses_main(word, sentence):
    concept_count = word['concept_count']
    if concept_count == 0:
@@ -434,7 +468,7 @@ def disambiguate_glosses_main(word, sentence):
       Undiac_lemma = word['Undiac_lemma']
       return disambiguate_glosses_using_SALMA(glosses, Diac_lemma, Undiac_lemma, input_word, sentence)
 
-def WSD(sentence):
+def find_words(sentence):
    
    input_sentence = simple_word_tokenize(sentence)
    
@@ -449,10 +483,10 @@ def WSD(sentence):
    ner = find_named_entities(" ".join(input_sentence))
 
    output_list = find_glosses(input_sentence, two_word_lemma, three_word_lemma, four_word_lemma, five_word_lemma, ner)
-   results = []
-   for word in output_list:
-      results.append(disambiguate_glosses_main(word, sentence))
-   return results
+   return output_list
+
+def WSD(sentence):
+   return disambiguate_sentences([(find_words(sentence), sentence)])[0]
 
 
 def disambiguate(sentence):
@@ -498,4 +532,27 @@ def disambiguate(sentence):
        return content
     else: 
        results = WSD(sentence)
-       return results 
\ No newline at end of file
+       return results 
+
+def disambiguate_batch(sentences, batch_size=32):
+    """
+    This method disambiguates several sentences like :func:`disambiguate`, but the candidate glosses of the ambiguous words of all the sentences are scored together by the ArabGlossBERT model, batch_size (sentence, gloss) pairs at a time, instead of one forward pass per ambiguous word.
+
+    Args:
+        sentences (:obj:`list`): The Arabic texts to be disambiguated.
+        batch_size (:obj:`int`): The number of (sentence, gloss) pairs per forward pass of the model (default is 32).
+
+    Returns:
+        :obj:`list`: A list with the output of :func:`disambiguate` for each sentence, in the same order.
+
+    **Example:**
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from sinatools.wsd.disambiguator import disambiguate_batch
+        results = disambiguate_batch(["تمشيت بين الجداول والأنهار", "أعلنت وزارة المالية في فلسطين"])
+    """
+    sentences_words = [(find_words(sentence), sentence) for sentence in sentences if len(sentence) <= 500]
+    results = iter(disambiguate_sentences(sentences_words, batch_size))
+    return [["Input is too long"] if len(sentence) > 500 else next(results) for sentence in sentences]
@@ -0,0 +1,110 @@
+import os
+import json
+import warnings
+import numpy as np
+from sinatools.DataDownload import downloader
+from sinatools.morphology import get_resource
+from sinatools.morphology.lexicon import MmapLexicon, build_lexicon
+
+# The encodings are stored in a lexicon file (see sinatools.morphology.lexicon) that maps each
+# concept_id to the subword IDs of its gloss, as int32 bytes. The file is memory-mapped, so it
+# is shared by all the processes running WSD and opening it costs almost nothing.
+GLOSS_ENCODINGS_FILE = 'gloss_encodings.lex'
+
+
+def default_path():
+    return os.path.join(downloader.get_appdatadir(), GLOSS_ENCODINGS_FILE)
+
+
+def source_paths():
+    """
+    The data files the encodings are built from: the single-word glosses dictionary and
+    the multi-word dictionaries, as pickles or lexicon files.
+    """
+    from sinatools.morphology import _RESOURCE_FILES, _lexicon_path
+
+    paths = [os.path.join(downloader.get_appdatadir(), 'one_gram.pickle')]
+    for name in ('two_grams', 'three_grams', 'four_grams', 'five_grams'):
+        paths.append(os.path.join(downloader.get_appdatadir(), _RESOURCE_FILES[name]))
+        paths.append(_lexicon_path(name))
+    return paths
+
+
+class GlossEncodings:
+    """
+    The subword IDs of the preprocessed glosses, keyed by concept_id. The IDs are read from the
+    lexicon file built by :func:`build_gloss_encodings` when it contains the concept, otherwise
+    the gloss is encoded with `encode` and kept in memory.
+
+    Args:
+        encode (:obj:`callable`): The function that encodes a gloss text into subword IDs.
+        path (:obj:`str`): The path of the lexicon file. If it does not exist, every gloss is encoded on first use.
+        sources (:obj:`list`): The files the lexicon file was built from, e.g. the glosses dictionaries and the tokenizer. If one of them is newer than the lexicon file, the lexicon file is ignored.
+    """
+
+    def __init__(self, encode, path=None, sources=()):
+        self.encode = encode
+        self.path = path
+        self.lexicon = MmapLexicon(path) if _is_current(path, sources) else None
+        self._encoded = {}
+
+    def get(self, concept_id, gloss):
+        key = str(concept_id)
+        if self.lexicon is not None and key in self.lexicon:
+            return np.frombuffer(self.lexicon[key], dtype=np.int32).tolist()
+
+        ids = self._encoded.get(key)
+        if ids is None:
+            ids = self._encoded[key] = self.encode(gloss)
+        return ids
+
+
+def _is_current(path, sources):
+    if not path or not os.path.exists(path):
+        return False
+    mtime = os.path.getmtime(path)
+    for source in sources:
+        if os.path.exists(source) and os.path.getmtime(source) > mtime:
+            warnings.warn(f"{path} is older than {source} and is ignored. "
+                          "Run build_gloss_cache to encode the glosses again.")
+            return False
+    return True
+
+
+def lexicon_glosses():
+    """
+    Yields (concept_id, gloss) for every concept of the single-word glosses dictionary and of
+    the multi-word (2 to 5 grams) dictionaries.
+    """
+    from sinatools.wsd import glosses_dic
+
+    for value in glosses_dic.values():
+        for concept in json.loads(value[1]):
+            yield concept['concept_id'], concept['gloss']
+
+    for name in ('two_grams', 'three_grams', 'four_grams', 'five_grams'):
+        for results in get_resource(name).values():
+            for result in results:
+                concept = json.loads(result[3])
+                yield concept['concept_id'], concept['gloss']
+
+
+def build_gloss_encodings(encode, path=None, glosses=None):
+    """
+    Encodes the glosses once and writes their subword IDs to a lexicon file, so that WSD does not
+    preprocess and tokenize the glosses of the candidate concepts again for every word.
+
+    Args:
+        encode (:obj:`callable`): The function that encodes a gloss text into subword IDs.
+        path (:obj:`str`): The path of the lexicon file. Defaults to `gloss_encodings.lex` in the application data directory.
+        glosses (:obj:`iterable`): (concept_id, gloss) pairs. Defaults to all the glosses of the lexicon, see :func:`lexicon_glosses`.
+
+    Returns:
+        :obj:`str`: The path of the written lexicon file.
+    """
+    encodings = {}
+    for concept_id, gloss in (glosses if glosses is not None else lexicon_glosses()):
+        key = str(concept_id)
+        if key not in encodings:
+            encodings[key] = np.asarray(encode(gloss), dtype=np.int32).tobytes()
+    return build_lexicon(encodings, path or default_path())
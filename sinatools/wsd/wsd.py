@@ -1,66 +1,107 @@
 from sinatools.wsd import settings 
+import os
 import re
+import functools
 import warnings
 warnings.filterwarnings("ignore")
 import torch
 import numpy as np
-import pandas as pd
 from sinatools.arabert.preprocess import ArabertPreprocessor
+from sinatools.wsd.gloss_encodings import GlossEncodings, build_gloss_encodings, source_paths, default_path as default_gloss_encodings_path
+
+arabert_prep = None
 
 def normalizearabert(s):
-  model_name = 'aubmindlab/bert-base-arabertv02'
-  arabert_prep = ArabertPreprocessor(model_name.split("/")[-1])
-  return arabert_prep.preprocess(str(s))
+# """
+# preprocesses a text for the arabertv02 model. One preprocessor is created on the first call
+# and reused, and the results are memoized: glosses, targets and examples repeat across
+# words and sentences
+# """
+  return _preprocess(str(s))
 
+@functools.lru_cache(maxsize=65536)
+def _preprocess(s):
+  global arabert_prep
+  if arabert_prep is None:
+    model_name = 'aubmindlab/bert-base-arabertv02'
+    arabert_prep = ArabertPreprocessor(model_name.split("/")[-1])
+  return arabert_prep.preprocess(s)
 
 
-def glosses1(dfcand,target):
+
+def score_encoded(pairs, batch_size=32):
 # """
-# takes a dataframe 
-# return 
-	# 'none' if the maximum logistic regression score for TRUE class is less than -2 OR
-	# the predicted gloss having the maximum logistic regression score
+# takes a list of (example IDs, "target: gloss" IDs) pairs of subword IDs, without [CLS] and [SEP]
+# returns the logits of the model for each pair (a numpy array of shape len(pairs) x 2),
+# the pairs are passed to the model batch_size at a time
 # """
-
-  wic_c = []
-  wic_c, _ = read_data(dfcand,normalizearabert,target)
-  tokenizedwic_c = np.array([settings.tokenizer.encode(x, max_length=512,padding='max_length',truncation='longest_first',add_special_tokens=True) for x in wic_c])
-  max_len = 512
-  segmentswic = torch.tensor([get_segments(settings.tokenizer.convert_ids_to_tokens(i),max_len) for i in tokenizedwic_c])
-  paddedwic = tokenizedwic_c
-  attention_maskwic = np.where(paddedwic != 0, 1, 0)
-  input_idswic = torch.tensor(paddedwic)  
-  attention_maskwic = torch.tensor(attention_maskwic)
   settings.model = settings.model.eval()
-  wicpredictions , wictrue_labels = [], []
-  b_input_ids = input_idswic
-  b_input_mask =  attention_maskwic
-  b_input_seg = segmentswic
-
-  with torch.no_grad():
-    outputs = settings.model(b_input_ids,token_type_ids=b_input_seg,attention_mask=b_input_mask)
-
-  logits = outputs[0]
-  wicpredictions.append(logits)
-  wicflat_predictions = np.concatenate(wicpredictions, axis=0)
-
-  return dfcand['Concept_id'].to_list()[np.argmax(wicflat_predictions, axis=0).flatten()[1]],dfcand['Gloss'].to_list()[np.argmax(wicflat_predictions, axis=0).flatten()[1]]
-
-def read_data(data,normalize,target):
-  c = []
-  labels = []
-  for i,row in data.iterrows():
-      
-      example = normalize(row['Example'])
-      gloss = normalize(row['Gloss'])
-      label = row['Label']
-      
-      c.append('{} [SEP] {}: {}'.format(example,target,gloss))
-      if label == 1.0:
-          labels.append(1)
-      else:
-          labels.append(0)
-  return c,labels
+  wicflat_predictions = np.zeros((len(pairs), 2), dtype=np.float32)
+
+  # Each batch is padded to its longest input, so the inputs are sorted by length to keep
+  # similar lengths together
+  order = sorted(range(len(pairs)), key=lambda i: len(pairs[i][0]) + len(pairs[i][1]))
+
+  for start in range(0, len(order), batch_size):
+    batch = order[start:start + batch_size]
+    features = [pair_features(pairs[i][0], pairs[i][1]) for i in batch]
+    encoded = settings.tokenizer.pad(features, padding='longest', return_tensors='pt')
+
+    with torch.no_grad():
+      outputs = settings.model(encoded['input_ids'],token_type_ids=encoded['token_type_ids'],attention_mask=encoded['attention_mask'])
+
+    wicflat_predictions[batch] = outputs[0].numpy()
+
+  return wicflat_predictions
+
+def pair_features(a, b, max_length=512):
+# """
+# takes the subword IDs of the two parts of an input
+# returns the model input "[CLS] a [SEP] b [SEP]", with the segment IDs (0 up to the first [SEP],
+# 1 after it). Inputs longer than max_length are truncated longest first, one subword at a time
+# from the end of the longer part
+# """
+  a, b = list(a), list(b)
+  while len(a) + len(b) > max_length - 3:
+    if len(a) > len(b):
+      a.pop()
+    else:
+      b.pop()
+
+  cls, sep = settings.tokenizer.cls_token_id, settings.tokenizer.sep_token_id
+  input_ids = [cls] + a + [sep] + b + [sep]
+  token_type_ids = [0] * (len(a) + 2) + [1] * (len(b) + 1)
+  return {'input_ids': input_ids, 'token_type_ids': token_type_ids, 'attention_mask': [1] * len(input_ids)}
+
+def encode_text(s):
+  return settings.tokenizer.encode(s, add_special_tokens=False)
+
+def encode_gloss(gloss):
+  return encode_text(normalizearabert(gloss))
+
+gloss_encodings = None
+
+def get_gloss_encodings():
+# """
+# returns the subword IDs of the glosses by concept_id, read from the gloss encodings file
+# built by build_gloss_cache if it exists and is newer than the glosses and the tokenizer
+# """
+  global gloss_encodings
+  if gloss_encodings is None:
+    sources = source_paths() + [os.path.join(settings.tokenizer_file_path, 'vocab.txt')]
+    gloss_encodings = GlossEncodings(encode_gloss, default_gloss_encodings_path(), sources)
+  return gloss_encodings
+
+def build_gloss_cache(path=None):
+# """
+# encodes the glosses of the whole lexicon once and writes them to a memory-mapped file,
+# used by predict_glosses instead of preprocessing and tokenizing the glosses for every word
+# returns the path of the file
+# """
+  global gloss_encodings
+  path = build_gloss_encodings(encode_gloss, path)
+  gloss_encodings = None
+  return path
 
 def inserttag1(sentence,tag,start,end):
     before = sentence[:start]
@@ -68,17 +109,6 @@ def inserttag1(sentence,tag,start,end):
     target = sentence[start:end]
     return before+tag+sentence[start:end]+tag+after
 
-def get_segments(tokens, max_seq_length):
-    if len(tokens)>max_seq_length:
-        raise IndexError("Token length more than max seq length!")
-    segments = []
-    current_segment_id = 0
-    for token in tokens:
-        segments.append(current_segment_id)
-        if token == "[SEP]":
-            current_segment_id = 1
-    return segments + [0] * (max_seq_length - len(tokens))
-
 def senttarget(target,example):
   start = -1
   try:
@@ -89,6 +119,26 @@ def senttarget(target,example):
   return inserttag1(example,"[UNUSED0]",start,end)
 
 
+def gloss_candidates(diac_lemma, undiac_lemma,target,example,glosses):
+# """
+# takes the same arguments as GlossPredictor
+# returns
+	# -1   if the example does not contain the target word  OR
+	# the example with the target word marked, and the list of (concept_id, gloss) candidates, which may be empty
+# """
+  example = senttarget(target,example)
+  if example == -1:
+    return -1
+  
+  # Every candidate has the same lemma, target and example, so the example is prepared once
+  # and duplicate candidates are the ones with the same concept_id and gloss
+  candidates = list(dict.fromkeys((g, glosses[g]) for g in glosses))
+  
+  example = example.upper()
+  example = re.sub(r'^((.?\[UNUSED0\].?){1})\[UNUSED0\]', r'\1[UNUSED1]', example)
+  return example, candidates
+
+
 def GlossPredictor(diac_lemma, undiac_lemma,target,example,glosses):
 # """ 
 # takes 
@@ -103,24 +153,41 @@ def GlossPredictor(diac_lemma, undiac_lemma,target,example,glosses):
 	# the predicted gloss for the target word 
 	# 
 # """
-  example = senttarget(target,example)
-  if example == -1:
-    return -1,-1
-  
-  data = []
-  for g in glosses:
-      data.append([g,diac_lemma,undiac_lemma, glosses[g], target,example,0,1,'','',''])
-  dfcolumns = ['Concept_id', 'Diac_lemma', 'Undiac_lemma', 'Gloss', 'Target', 'Example', 'Is_training', 'Label', 'concept_id', 'lemma_id', 'POS']
-  dfcand = pd.DataFrame(data,columns=dfcolumns)
-  
-  
-  if len(dfcand) > 0:
-    dfcand['Example'] = dfcand['Example'].apply(lambda x: example)
-    dfcand['Target'] = dfcand['Target'].apply(lambda x: target)
-    dfcand = dfcand.drop_duplicates()
-  
-    dfcand['Example'] = dfcand['Example'].apply(lambda x: x.upper())
-    dfcand['Example'] = dfcand['Example'].apply(lambda x: re.sub(r'^((.?\[UNUSED0\].?){1})\[UNUSED0\]', r'\1[UNUSED1]', x) )
-    return glosses1(dfcand,target)
-  else:
-    return 'none','none'
\ No newline at end of file
+  return predict_glosses([(diac_lemma, undiac_lemma, target, example, glosses)])[0]
+
+
+def predict_glosses(words, batch_size=32):
+# """
+# takes a list of (diac_lemma, undiac_lemma, target, example, glosses) tuples, with the
+# arguments of GlossPredictor, e.g. every ambiguous word of a sentence or of several sentences
+# returns the result of GlossPredictor for each word, in the same order
+# The candidate glosses of all the words are scored together, batch_size at a time, and the
+# best gloss is then chosen among the candidates of each word
+# """
+  results = [None] * len(words)
+  groups, pairs = [], []
+  encodings = get_gloss_encodings()
+
+  for i, (diac_lemma, undiac_lemma, target, example, glosses) in enumerate(words):
+    found = gloss_candidates(diac_lemma, undiac_lemma, target, example, glosses)
+    if found == -1:
+      results[i] = -1, -1
+    elif len(found[1]) == 0:
+      results[i] = 'none', 'none'
+    else:
+      # The input of each candidate is "example [SEP] target: gloss". The example and the
+      # target are encoded once per word, the glosses come from the gloss encodings
+      marked_example, candidates = found
+      example_ids = encode_text(normalizearabert(marked_example))
+      target_ids = encode_text('{}:'.format(target))
+      groups.append((i, candidates, len(pairs), len(candidates)))
+      for concept_id, gloss in candidates:
+        pairs.append((example_ids, target_ids + encodings.get(concept_id, gloss)))
+
+  wicflat_predictions = score_encoded(pairs, batch_size)
+
+  for i, candidates, start, count in groups:
+    best = np.argmax(wicflat_predictions[start:start + count], axis=0).flatten()[1]
+    results[i] = candidates[best]
+
+  return results
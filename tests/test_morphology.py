@@ -67,3 +67,134 @@ def test_analyze_single_task():
 )
 def test_is_ar(word, expected):
     assert morph_analyzer._is_ar(word) == expected
+
+
+@pytest.fixture
+def small_lemmas(tmp_path, monkeypatch):
+    import pickle
+
+    from sinatools import morphology
+
+    lemmas = {
+        "ولد": [["ولد", 10, "وَلَدٌ", 202003092, "و ل د", "اسم"]],
+        "الولد": [["الولد", 8, "وَلَدٌ", 202003092, "و ل د", "اسم"]],
+        "ذهب": [
+            ["ذهب", 5, "ذَهَبَ", 202001617, "ذ ه ب", "فعل"],
+            ["ذهب", 1, "ذَهَبٌ", 202001618, "ذ ه ب", "اسم"],
+        ],
+        "مدرسة": [["مدرسة", 3, "مَدْرَسَةٌ", 202002620, "د ر س", "اسم"]],
+    }
+    with open(tmp_path / "lemmas_dic.pickle", "wb") as f:
+        pickle.dump(lemmas, f)
+    monkeypatch.setattr(morphology.downloader, "get_appdatadir", lambda: tmp_path)
+    monkeypatch.setattr(morphology, "_resources", {})
+    monkeypatch.setattr(morph_analyzer, "_cache", morph_analyzer.SolutionCache())
+    return lemmas
+
+
+def test_resources_are_loaded_lazily(small_lemmas):
+    from sinatools import morphology
+
+    assert "lemmas" not in morphology._resources
+    assert morph_analyzer.find_solution("ولد", "MSA", "1") == small_lemmas["ولد"]
+    assert morphology._resources["lemmas"] == small_lemmas
+    assert morphology.dictionary is morphology._resources["lemmas"]
+
+
+def test_analyze_batch(small_lemmas):
+    texts = ["ذهب الولد الى المدرسة", "", "الولد ذهب، 12 ولد", "مدرسه école"]
+    for task in ["full", "lemmatization", "pos", "root"]:
+        for flag in ["1", "*"]:
+            assert morph_analyzer.analyze_batch(texts, task=task, flag=flag) == [
+                morph_analyzer.analyze(text, task=task, flag=flag) for text in texts
+            ]
+
+
+def test_variant_index(small_lemmas, monkeypatch):
+    text = "ذَهَبَ الْوَلَدُ إلى مَدْرَسَةٍ كتاب"
+    expected = [morph_analyzer.analyze(text, flag=flag) for flag in ["1", "*"]]
+
+    monkeypatch.setattr(morph_analyzer, "_variant_index", None)
+    assert "مدرسة" in morph_analyzer.build_variant_index()
+    assert [morph_analyzer.analyze(text, flag=flag) for flag in ["1", "*"]] == expected
+
+
+def test_variant_index_keeps_fallback_order(small_lemmas, monkeypatch):
+    from sinatools import morphology
+
+    # Three keys with the same normalized form "امل": the fallbacks must still pick
+    # the first of them that they produce
+    lemmas = dict(small_lemmas)
+    lemmas["أمل"] = [["أمل", 7, "أَمَلٌ", 1, "أ م ل", "اسم"]]
+    lemmas["امل"] = [["امل", 2, "أَمَلَ", 2, "أ م ل", "فعل"]]
+    lemmas["أَمَل"] = [["أَمَل", 1, "أَمَلٌ", 3, "أ م ل", "اسم"]]
+    monkeypatch.setattr(morphology, "_resources", {"lemmas": lemmas})
+
+    monkeypatch.setattr(morph_analyzer, "_variant_index", None)
+    text = "إَمَل أَمَلٌ أمَل آمل ولدُ مدرسه"
+    expected = [morph_analyzer.analyze(text, flag=flag) for flag in ["1", "*"]]
+
+    assert morph_analyzer.build_variant_index()["امل"] == ("أمل", "امل", "أَمَل")
+    morph_analyzer._cache.clear()
+    assert [morph_analyzer.analyze(text, flag=flag) for flag in ["1", "*"]] == expected
+
+
+def test_mmap_lexicon(tmp_path):
+    from sinatools.morphology.lexicon import MmapLexicon, build_lexicon
+
+    dictionary = {
+        "ولد": [["ولد", 10, "وَلَدٌ", 202003092, "و ل د", "اسم"]],
+        "ذهب": [["ذهب", 5, "ذَهَبَ", 202001617, "ذ ه ب", "فعل"], ["ذهب", 1, "ذَهَبٌ", 1, "ذ ه ب", "اسم"]],
+        "a": [],
+    }
+    lexicon = MmapLexicon(build_lexicon(dictionary, str(tmp_path / "lemmas.lex")))
+
+    assert len(lexicon) == 3
+    assert dict(lexicon) == dictionary
+    assert "ذهب" in lexicon.keys()
+    assert "كتب" not in lexicon
+    assert lexicon.get("كتب") is None
+    with pytest.raises(KeyError):
+        lexicon["كتب"]
+
+
+def test_solution_cache(small_lemmas, monkeypatch):
+    morph_analyzer.configure_cache(max_size=2, policy="lru")
+
+    expected = morph_analyzer.analyze("ذهب الولد ذهب")
+    assert morph_analyzer.cache_info() == {
+        "hits": 1,
+        "misses": 2,
+        "evictions": 0,
+        "size": 2,
+        "max_size": 2,
+        "policy": "lru",
+    }
+    assert morph_analyzer.analyze("ذهب الولد ذهب") == expected
+
+    morph_analyzer.analyze("مدرسة")
+    info = morph_analyzer.cache_info()
+    assert (info["hits"], info["misses"], info["evictions"]) == (4, 3, 1)
+
+    with pytest.raises(ValueError):
+        morph_analyzer.configure_cache(policy="random")
+
+
+def test_stale_lexicon_is_ignored(small_lemmas):
+    import os
+
+    from sinatools import morphology
+    from sinatools.morphology.lexicon import MmapLexicon
+
+    lexicon_path, = morphology.convert_resources(["lemmas"])
+    assert isinstance(morphology.get_resource("lemmas"), MmapLexicon)
+
+    # The pickle is downloaded again after the conversion
+    pickle_path = os.path.join(morphology.downloader.get_appdatadir(), "lemmas_dic.pickle")
+    mtime = os.path.getmtime(lexicon_path)
+    os.utime(pickle_path, (mtime + 10, mtime + 10))
+    morphology._resources.clear()
+
+    with pytest.warns(UserWarning):
+        assert morphology.get_resource("lemmas") == small_lemmas
+    assert not isinstance(morphology.get_resource("lemmas"), MmapLexicon)
@@ -19,6 +19,32 @@ sinatools/ner/__init__.py:22: in <module>
     self._handle = _dlopen(self._name, mode)
 E   OSError: /opt/hostedtoolcache/Python/3.12.7/x64/lib/python3.12/site-packages/torchtext/lib/libtorchtext.so: undefined symbol: _ZN5torch3jit17parseSchemaOrNameERKSs
 """
+import importlib
+import itertools
+import random
+import re
+
+import pytest
+
+
+def _import_ner(module):
+    # Importing sinatools.ner loads the NER model from the data directory
+    pytest.importorskip("torch")
+    try:
+        return importlib.import_module(module)
+    except Exception as e:
+        pytest.skip(f"{module} cannot be imported: {e}")
+
+
+class _Vocab:
+    def __init__(self, itos):
+        self.itos = itos
+
+    def get_itos(self):
+        return self.itos
+
+    def get_stoi(self):
+        return {tag: i for i, tag in enumerate(self.itos)}
 
 
 def test_extract_entities_nested():
@@ -36,6 +62,22 @@ def test_extract_entities_nested():
     ]
 
 
+def test_extract_batch_matches_extract():
+    entity_extractor = _import_ner("sinatools.ner.entity_extractor")
+
+    # Texts of very different lengths, so that the sorted batches differ from the input order
+    texts = [
+        " ".join(["ذهب محمد إلى جامعة بيرزيت"] * 40),
+        "في فلسطين",
+        "ذهب محمد إلى جامعة بيرزيت",
+        " ".join(["ذهب محمد إلى جامعة بيرزيت"] * 150),
+        "محمد",
+    ]
+    for ner_method in ["nested", "flat"]:
+        expected = [entity_extractor.extract(text, ner_method=ner_method) for text in texts]
+        assert entity_extractor.extract_batch(texts, ner_method=ner_method, batch_size=2) == expected
+
+
 def test_extract_entities_flat():
     try:
         from sinatools.ner.entity_extractor import extract
@@ -49,3 +91,170 @@ def test_extract_entities_flat():
         {"token": "جامعة", "tags": "B-ORG"},
         {"token": "بيرزيت", "tags": "I-ORG"},
     ]
+
+
+def test_extract_long_text():
+    extract = _import_ner("sinatools.ner.entity_extractor").extract
+
+    # Longer than the 512 subwords of the model, tagged in overlapping windows
+    text = " ".join(["ذهب محمد إلى جامعة بيرزيت"] * 150)
+    output = extract(text)
+    assert [d["token"] for d in output] == text.split()
+    assert output[-4]["tags"] == "B-PERS"
+
+
+def test_tags_by_type_matches_regex():
+    helpers = _import_ner("sinatools.ner.helpers")
+
+    # The tag vocabs are built like tag_vocab_by_type: B-ORG_FAC matches both ".*-ORG"
+    # and ".*-ORG_FAC", so it belongs to the vocabs of both types
+    tags = ["B-PERS", "I-PERS", "B-ORG", "I-ORG", "B-ORG_FAC", "I-ORG_FAC", "B-GPE", "I-GPE", "O"]
+    types = sorted({tag.split("-", 1)[1] for tag in tags if "-" in tag})
+    vocabs = [_Vocab(["<pad>"] + [tag for tag in tags if re.match(".*-" + tag_type, tag)] + ["O"])
+              for tag_type in types]
+    lookup = helpers.tag_type_lookup(vocabs)
+
+    random.seed(0)
+    tokens = [list(p) for n in range(4) for p in itertools.permutations(tags, n)]
+    tokens += [random.sample(tags, random.randint(1, len(tags))) for _ in range(200)]
+    for gold_tag in tokens:
+        type_tags = helpers.tags_by_type(gold_tag, lookup, len(vocabs))
+        for vocab, tag_id in zip(vocabs, type_tags):
+            r = re.compile("|".join([tag for tag in vocab.get_itos() if "-" in tag]))
+            expected = (list(filter(r.match, gold_tag)) or ["O"])[0]
+            assert ("O" if tag_id is None else vocab.get_itos()[tag_id]) == expected
+
+    # The first tag of a type wins
+    orgs = helpers.tags_by_type(["I-ORG", "B-PERS", "B-ORG"], lookup, len(vocabs))[types.index("ORG")]
+    assert vocabs[types.index("ORG")].get_itos()[orgs] == "I-ORG"
+
+
+@pytest.mark.parametrize("window_overlap", [0, 3, 6])
+def test_windows(window_overlap):
+    from types import SimpleNamespace
+
+    entity_extractor = _import_ner("sinatools.ner.entity_extractor")
+
+    # One subword per character, with [CLS] and [SEP]
+    session = entity_extractor.NERSession.__new__(entity_extractor.NERSession)
+    session.transform = SimpleNamespace(max_seq_len=12, encoder=lambda text: [2] + [1] * len(text) + [3])
+    session.window_overlap = window_overlap
+    max_len = session.transform.max_seq_len - 2
+
+    random.seed(0)
+    words = ["ab", "abc", "a", "abcd", "abcdefghijklmn", "�"]
+    for _ in range(50):
+        segment = [SimpleNamespace(text=random.choice(words)) for _ in range(random.randint(1, 30))]
+        lengths = [len(token.text) for token in segment]
+        windows = session._windows(segment)
+
+        assert windows[0][0] == 0 and windows[-1][1] == len(segment)
+        for start, end in windows:
+            # A single token longer than a window gets a window of its own
+            assert end > start
+            assert sum(lengths[start:end]) <= max_len or end - start == 1
+        for (start, end), (next_start, next_end) in zip(windows, windows[1:]):
+            # Each window moves forward, without gaps, and overlaps the previous one
+            # by at most window_overlap subwords
+            assert start < next_start <= end < next_end
+            assert sum(lengths[next_start:end]) <= window_overlap
+
+
+def test_merge_predictions():
+    datasets = _import_ner("sinatools.ner.datasets")
+    entity_extractor = _import_ner("sinatools.ner.entity_extractor")
+
+    segment = [datasets.Token(text=text) for text in ["a", "b", "c"]]
+
+    def tagged(*tags):
+        return [datasets.Token(pred_tag=[{"tag": tag, "score": score} for tag, score in token_tags])
+                for token_tags in tags]
+
+    # Two windows share "b": each tag type keeps the prediction with the highest score
+    first = tagged([("O", 0.9), ("B-ORG", 0.6)], [("B-PERS", 0.4), ("O", 0.8)])
+    second = tagged([("O", 0.7), ("I-ORG", 0.9)], [("O", 0.5), ("O", 0.6)])
+    predicted = entity_extractor._merge_predictions([first, second], [segment[0:2], segment[1:3]])
+
+    assert predicted == {id(token) for token in segment}
+    assert [tag["tag"] for tag in segment[0].pred_tag] == ["O", "B-ORG"]
+    assert [tag["tag"] for tag in segment[1].pred_tag] == ["O", "I-ORG"]
+    assert [tag["tag"] for tag in segment[2].pred_tag] == ["O", "O"]
+
+
+def test_pretokenized_segments_match_transform(tmp_path):
+    datasets = _import_ner("sinatools.ner.datasets")
+    transforms = _import_ner("sinatools.ner.transforms")
+    from sinatools.ner import tag_vocab, train_config
+    from sinatools.ner.entity_extractor import Vocab
+
+    vocab = Vocab(tokens=None, tags=tag_vocab)
+    transform = transforms.NestedTagsTransform(
+        train_config.data_config["kwargs"]["bert_model"], vocab, max_seq_len=16)
+
+    def segment(*tokens):
+        return [datasets.Token(text=text, gold_tag=gold_tag) for text, gold_tag in tokens]
+
+    # "�" has no subwords, and the last segment is truncated to max_seq_len
+    segments = [
+        segment(("ذهب", ["O"]), ("محمد", ["B-PERS"]), ("إلى", ["O"]), ("جامعة", ["B-ORG"]),
+                ("بيرزيت", ["B-GPE", "I-ORG"])),
+        segment(("محمد", ["B-PERS"]), ("�", ["O"]), ("بيرزيت", ["B-GPE"])),
+        segment(*[("بيرزيت", ["B-GPE"])] * 20),
+    ]
+    datasets.pretokenize(segments, vocab, str(tmp_path), transform=transform)
+    pretokenized = datasets.PretokenizedSegments(str(tmp_path), vocab)
+
+    assert len(pretokenized) == len(segments)
+    for i, example in enumerate(segments):
+        subwords, tags, tokens, _, valid_len, first_subword = transform(example)
+        saved_subwords, saved_tags, saved_tokens, _, saved_valid_len, saved_first_subword = pretokenized[i]
+
+        assert saved_subwords.tolist() == subwords.tolist()
+        assert saved_tags.tolist() == tags.tolist()
+        assert saved_first_subword.tolist() == first_subword.tolist()
+        assert saved_valid_len == valid_len
+        assert [token.text for token in saved_tokens] == [token.text for token in tokens]
+
+
+def test_fast_tokenizer_matches_slow_tokenizer():
+    pytest.importorskip("transformers")
+    datasets = _import_ner("sinatools.ner.datasets")
+    transforms = _import_ner("sinatools.ner.transforms")
+    from sinatools.ner import train_config
+
+    bert_model = train_config.data_config["kwargs"]["bert_model"]
+    slow = transforms.BertTransform(bert_model, None)
+    fast = transforms.BertTransform(bert_model, None, fast_tokenizer=True)
+
+    # Diacritics, punctuation, digits, Latin text and a token without subwords
+    text = "ذَهَبَ محمد، إلى جامعة بيرزيت في 2023 ( Birzeit University ) � !"
+    segment = [datasets.Token(text=token) for token in text.split()]
+    assert fast.encode_tokens(segment) == slow.encode_tokens(segment)
+
+
+@pytest.mark.parametrize("export_format", ["torchscript", "onnx"])
+def test_exported_tagger_matches_eager_model(tmp_path, export_format):
+    torch = pytest.importorskip("torch")
+    if export_format == "onnx":
+        pytest.importorskip("onnxruntime")
+    export = _import_ner("sinatools.ner.export")
+    from sinatools.ner import tagger
+
+    model = tagger.model.module if isinstance(tagger.model, torch.nn.DataParallel) else tagger.model
+    model = model.cpu().eval()
+    path = str(tmp_path / ("ner.pt" if export_format == "torchscript" else "ner.onnx"))
+
+    # Traced with one short segment, run with a larger padded batch of longer segments
+    torch.manual_seed(0)
+    export.export_model(model, path, torch.randint(1000, 2000, (1, 8)), export_format=export_format, quantize=False)
+    exported = export.ExportedTagger(path)
+
+    subwords = torch.randint(1000, 2000, (3, 40))
+    subwords[1, 25:] = 0
+    attention_mask = (subwords != 0).long()
+    with torch.no_grad():
+        expected = model(subwords, attention_mask=attention_mask)
+        logits = exported(subwords, attention_mask=attention_mask)
+
+    assert logits.shape == expected.shape
+    assert torch.allclose(logits, expected, atol=1e-4)
@@ -1,6 +1,9 @@
+import json
+import re
+
 import pytest
 
-from sinatools.utils import parser, similarity, word_compare
+from sinatools.utils import parser, similarity, tokenizer, word_compare
 
 
 class TestParser:
@@ -16,6 +19,22 @@ class TestParser:
     def test_ar_strip(self, input_text, expected_output, kwargs):
         assert parser.arStrip(input_text, **kwargs) == expected_output
 
+    @pytest.mark.parametrize(
+        "input_text, expected_output, kwargs",
+        [
+            ("أَلَمۡ یَأۡنِ ٱلۡكِتَـٰبَ", "الم یان الكتٰب", {}),
+            ("أَلَمۡ یَأۡنِ ٱلۡكِتَـٰبَ", "اَلَم یَانِ الكِتَٰبَ", {"diacs": False, "shaddah": False}),
+            ("أَلَمۡ یَأۡنِ ٱلۡكِتَـٰبَ", "المۡ یاۡن الۡكتٰب", {"small_diacs": False}),
+            ("  أبريل?! _ ٢٠٢٤\tـ 12 ", "ابريل", {}),
+            ("  أبريل?! _ ٢٠٢٤\tـ 12 ", "أبريل  ٢٠٢٤  12", {"alif": False, "digit": False}),
+            ("  أبريل?! _ ٢٠٢٤\tـ 12 ", "ابريل?!", {"special_chars": False}),
+        ],
+    )
+    def test_get_normalizer(self, input_text, expected_output, kwargs):
+        normalize = parser.get_normalizer(**kwargs)
+        assert normalize(input_text) == expected_output
+        assert parser.get_normalizer(**kwargs) is normalize
+
     # TODO: remove_latin keeps spaces. Check if this is the expected behavior.
     @pytest.mark.parametrize(
         "input_text, expected_output",
@@ -40,6 +59,27 @@ class TestParser:
     def test_remove_punctuation(self, input_text, expected_output):
         assert parser.remove_punctuation(input_text) == expected_output
 
+    @pytest.mark.parametrize(
+        "input_text",
+        [
+            "".join(map(chr, range(0x20, 0x7F))),
+            "".join(map(chr, range(0x600, 0x700))),
+            "«تخطيط موارد المؤسسة» [U+060C] ٪٬ ـ؞؛؟، 2024",
+            "",
+        ],
+    )
+    def test_remove_punctuation_matches_patterns(self, input_text):
+        # the list of patterns that remove_punctuation used to apply one by one
+        patterns = [r'[\u0021-\u002F]+', r'[U+060C]+', r'[\u003A-\u0040]+',
+                    r'[\u005B-\u0060]+', r'[\u007B-\u007E]+', r'[\u060C]+',
+                    r'[\u061B]+', r'[\u061E]+', r'[\u061F]+', r'[\u0640]+',
+                    r'[\u0653]+', r'[\u065C]+', r'[\u066C]+', r'[\u066A]+',
+                    r'["}"]+', r'["{"]+']
+        expected_output = input_text
+        for pattern in patterns:
+            expected_output = re.sub(pattern, "", expected_output)
+        assert parser.remove_punctuation(input_text) == expected_output
+
 
 class TestWordCompare:
     def test_implication(self):
@@ -91,3 +131,77 @@ class TestSimilarity:
             ignoreAllDiacriticsButNotShadda=True,
             ignoreShaddaDiacritic=True,
         ) == ["intersection:", ["فعل"], "union:", ["فعل", "فعل"], "similarity:", 0.5]
+
+
+class TestTokenizer:
+    @pytest.mark.parametrize(
+        "input_text, expected_output, kwargs",
+        [
+            (
+                "مختبر سينا لحوسبة اللغة والذكاء الإصطناعي. في جامعة بيرزيت.",
+                ["مختبر سينا لحوسبة اللغة والذكاء الإصطناعي.", "في جامعة بيرزيت."],
+                {},
+            ),
+            ("أين؟ هنا!\nوهناك. ", ["أين؟", "هنا!", "وهناك."], {}),
+            ("أ. ب. ج", ["أ.", " ب.", "ج"], {"new_line": False, "question_mark": False, "exclamation_mark": False}),
+            (" أ. ب ", [" أ. ب "], {"dot": False, "new_line": False, "question_mark": False, "exclamation_mark": False}),
+            ("", [], {}),
+        ],
+    )
+    def test_sentence_tokenizer(self, input_text, expected_output, kwargs):
+        assert tokenizer.sentence_tokenizer(input_text, **kwargs) == expected_output
+
+    def test_iter_sentences_from_chunks(self):
+        text = "السطر الأول. فيه جملتان\nالسطر الثاني؟ نعم! \n\nالأخير"
+        chunks = [text[i:i + 5] for i in range(0, len(text), 5)]
+        assert list(tokenizer.iter_sentences(iter(chunks))) == tokenizer.sentence_tokenizer(text)
+
+    @pytest.fixture
+    def corpus_dir(self, tmp_path):
+        corpus = tmp_path / "History"
+        (corpus / "Modern").mkdir(parents=True)
+        (corpus / "h1.txt").write_text("الطيور الضارة ومكافحتها.\nبشكل عام", encoding="utf-8")
+        (corpus / "h2.txt").write_text("في جامعة بيرزيت. مختبر سينا", encoding="utf-8")
+        (corpus / "Modern" / "h3.txt").write_text("ذهب الولد إلى المدرسة", encoding="utf-8")
+        (corpus / "notes.md").write_text("ignored", encoding="utf-8")
+        return corpus
+
+    def test_corpus_tokenizer_parallel(self, corpus_dir, tmp_path):
+        tokenizer.corpus_tokenizer(str(corpus_dir), str(tmp_path / "seq.csv"), row_id=3, global_sentence_id=2)
+        tokenizer.corpus_tokenizer(str(corpus_dir), str(tmp_path / "par.csv"), row_id=3, global_sentence_id=2, workers=2)
+
+        output = (tmp_path / "seq.csv").read_text(encoding="utf-8")
+        assert len(output.splitlines()) == 1 + 16
+        assert output.splitlines()[1].startswith("3,")
+        assert (tmp_path / "par.csv").read_text(encoding="utf-8") == output
+
+    def test_corpus_tokenizer_resume(self, corpus_dir, tmp_path):
+        output_csv, manifest = str(tmp_path / "out.csv"), str(tmp_path / "out.manifest")
+        tokenizer.corpus_tokenizer(str(corpus_dir), output_csv, manifest=manifest)
+        expected = (tmp_path / "out.csv").read_text(encoding="utf-8")
+
+        # interrupt after the first file: keep its checkpoint, with a partial checkpoint and partial rows after it
+        checkpoints = (tmp_path / "out.manifest").read_text(encoding="utf-8").splitlines()
+        assert len(checkpoints) == 4
+        (tmp_path / "out.manifest").write_text("\n".join(checkpoints[:2]) + '\n{"file": "h', encoding="utf-8")
+        with open(output_csv, "r+b") as f:
+            f.truncate(json.loads(checkpoints[1])["offset"] + 10)
+
+        tokenizer.corpus_tokenizer(str(corpus_dir), output_csv, manifest=manifest, workers=2)
+        assert (tmp_path / "out.csv").read_text(encoding="utf-8") == expected
+        assert len((tmp_path / "out.manifest").read_text(encoding="utf-8").splitlines()) == 4
+
+    def test_corpus_tokenizer_parquet(self, corpus_dir, tmp_path):
+        pd = pytest.importorskip("pandas")
+        pytest.importorskip("pyarrow")
+        tokenizer.corpus_tokenizer(str(corpus_dir), str(tmp_path / "out.csv"))
+        tokenizer.corpus_tokenizer(str(corpus_dir), str(tmp_path / "out"), output_format="parquet")
+
+        sentences = pd.read_parquet(tmp_path / "out" / "sentences.parquet")
+        words = pd.read_parquet(tmp_path / "out" / "words.parquet")
+        assert len(sentences) == 5
+        merged = words.merge(sentences, on="Global Sentence ID")[
+            ["Row_ID", "Docs_Sentence_Word_ID", "Global Sentence ID", "Sentence ID", "Sentence", "Word Position", "Word"]
+        ]
+        expected = pd.read_csv(tmp_path / "out.csv")
+        assert merged.values.tolist() == expected.values.tolist()
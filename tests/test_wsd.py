@@ -68,3 +68,53 @@ def test_disambiguate_2():
         {"word": "الضفة الغربية", "gloss": "اسم بلد، له حدود إدارية/جيوسياسية"},
         {"word": "وقطاع غزة", "gloss": "اسم بلد، له حدود إدارية/جيوسياسية"},
     ]
+
+
+def test_gloss_encodings(tmp_path):
+    from sinatools.wsd.gloss_encodings import GlossEncodings, build_gloss_encodings
+
+    encoded = []
+
+    def encode(gloss):
+        encoded.append(gloss)
+        return [ord(c) for c in gloss]
+
+    glosses = [("303051631", "مشى"), (303005470, "ظرف"), ("303051631", "مشى")]
+    path = build_gloss_encodings(encode, str(tmp_path / "gloss_encodings.lex"), glosses=glosses)
+    assert encoded == ["مشى", "ظرف"]
+
+    # The concepts of the file are read from it, the others are encoded once and kept
+    encoded.clear()
+    encodings = GlossEncodings(encode, path)
+    assert encodings.get("303051631", "مشى") == [ord(c) for c in "مشى"]
+    assert encodings.get(303005470, "ظرف") == [ord(c) for c in "ظرف"]
+    assert encoded == []
+    assert encodings.get("303007335", "جدول") == [ord(c) for c in "جدول"]
+    assert encodings.get("303007335", "جدول") == [ord(c) for c in "جدول"]
+    assert encoded == ["جدول"]
+
+    # Without the file, every concept is encoded on first use
+    encodings = GlossEncodings(encode, str(tmp_path / "missing.lex"))
+    assert encodings.get("303051631", "مشى") == [ord(c) for c in "مشى"]
+    assert encoded == ["جدول", "مشى"]
+
+
+def test_stale_gloss_encodings_are_ignored(tmp_path):
+    import os
+
+    from sinatools.wsd.gloss_encodings import GlossEncodings, build_gloss_encodings
+
+    def encode(gloss):
+        return [len(gloss)]
+
+    path = build_gloss_encodings(lambda gloss: [0], str(tmp_path / "gloss_encodings.lex"), glosses=[("1", "مشى")])
+    source = tmp_path / "one_gram.pickle"
+    source.write_bytes(b"")
+    assert GlossEncodings(encode, path, sources=[str(source)]).get("1", "مشى") == [0]
+
+    # The glosses are downloaded again after the file was built
+    mtime = os.path.getmtime(path)
+    os.utime(source, (mtime + 10, mtime + 10))
+    with pytest.warns(UserWarning):
+        encodings = GlossEncodings(encode, path, sources=[str(source)])
+    assert encodings.get("1", "مشى") == [3]